@@ -0,0 +1,119 @@
+"""
+Startup benchmark of the component.
+
+Measures, in a fresh interpreter per sample, the time to import `component` and the time from interpreter
+start of the measurement to the first HTTP request of each action. Network calls are intercepted, so no
+credentials or connectivity are needed. The medians are compared with the budget in
+`startup_budget.json`; the script exits with 1 when any of them exceeds its budget.
+
+Usage:
+    python scripts/benchmark_startup.py [--repeat 5] [--budget scripts/startup_budget.json]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_BUDGET = Path(__file__).resolve().parent / "startup_budget.json"
+ACTIONS = ("run", "selectWorkspace", "selectDataset", "selectDataflow")
+
+HARNESS = """
+import json, sys, time
+
+start = time.perf_counter()
+sys.path.insert(0, {src!r})
+import component
+imported = time.perf_counter()
+
+
+class FirstRequest(BaseException):
+    pass
+
+
+def first_request(*args, **kwargs):
+    raise FirstRequest
+
+
+for method in ("get", "post", "delete"):
+    setattr(component.requests, method, first_request)
+
+try:
+    component.Component().execute_action()
+except FirstRequest:
+    pass
+else:
+    raise SystemExit("The action finished without any HTTP request.")
+
+print(json.dumps({{"import_ms": (imported - start) * 1000, "first_request_ms": (time.perf_counter() - start) * 1000}}))
+"""
+
+
+def _write_data_dir(data_dir: Path, action: str) -> None:
+    config = {
+        "action": action,
+        "parameters": {
+            "workspace": "27582307-ab04-4269-a6e7-4d1c803ba6ba",
+            "dataset_list": ["3ad5e537-2352-43f2-a30e-14c6eb11712e"],
+            "wait": "No",
+        },
+        "authorization": {
+            "oauth_api": {
+                "credentials": {
+                    "id": "DUMMY_CRED_ID",
+                    "appKey": "DUMMY_CLIENT_ID",
+                    "#appSecret": "DUMMY_CLIENT_SECRET",
+                    "#data": json.dumps({"refresh_token": "DUMMY_REFRESH_TOKEN"}),
+                }
+            }
+        },
+    }
+    (data_dir / "in").mkdir(parents=True, exist_ok=True)
+    (data_dir / "out").mkdir(parents=True, exist_ok=True)
+    (data_dir / "config.json").write_text(json.dumps(config))
+
+
+def _sample(action: str) -> dict:
+    with tempfile.TemporaryDirectory() as data_dir:
+        _write_data_dir(Path(data_dir), action)
+        result = subprocess.run(
+            [sys.executable, "-c", HARNESS.format(src=str(ROOT / "src"))],
+            env={"KBC_DATADIR": data_dir, "PATH": ""},
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="samples per action, the median is reported")
+    parser.add_argument("--budget", type=Path, default=DEFAULT_BUDGET, help="budget file in milliseconds")
+    args = parser.parse_args()
+
+    budget = json.loads(args.budget.read_text())
+    measured = {}
+    import_samples = []
+    for action in ACTIONS:
+        samples = [_sample(action) for _ in range(args.repeat)]
+        import_samples.extend(s["import_ms"] for s in samples)
+        measured[action] = statistics.median(s["first_request_ms"] for s in samples)
+    measured = {"import": statistics.median(import_samples), **measured}
+
+    over_budget = False
+    print(f"{'measurement':<20}{'median ms':>12}{'budget ms':>12}")
+    for name, value in measured.items():
+        limit = budget[name]
+        over_budget |= value > limit
+        print(f"{name:<20}{value:>12.1f}{limit:>12}{'  OVER BUDGET' if value > limit else ''}")
+
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,4 +2,5 @@
 set -e
 
 flake8 --config=flake8.cfg
-python -m unittest discover
\ No newline at end of file
+python -m unittest discover
+python scripts/benchmark_startup.py
\ No newline at end of file
@@ -5,9 +5,14 @@ Template Component main class.
 
 import json
 import logging
+import random
 import re
+import threading
 import time
-from datetime import datetime  # noqa
+from collections import Counter
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime, timedelta
 
 import backoff
 import requests
@@ -17,18 +22,71 @@ from requests import RequestException
 
 # configuration variables
 KEY_DATASET = "dataset_list"
+KEY_DATAFLOW = "dataflow_list"
 KEY_WORKSPACE = "workspace"
 KEY_TENANT_ID = "tenant_id"
+KEY_AUTH_TYPE = "auth_type"
+KEY_SP_CLIENT_ID = "client_id"
+KEY_SP_CLIENT_SECRET = "#client_secret"
 
 DEFAULT_AUTHORITY = "common"
+AUTH_TYPE_SERVICE_PRINCIPAL = "Service Principal"
+POWERBI_RESOURCE = "https://analysis.windows.net/powerbi/api"
+TOKEN_EXPIRY_MARGIN = 300  # seconds, a cached token this close to expiry is not reused
 
 STATE_AUTH_ID = "auth_id"
 STATE_REFRESH_TOKEN = "#refresh_token"
+STATE_REFRESH_QUOTA = "refresh_quota"
+STATE_SP_TOKEN = "#service_principal_token"
+STATE_SP_TOKEN_EXPIRES_ON = "service_principal_token_expires_on"
+STATE_SP_ID = "service_principal_id"
 REQUIRED_PARAMETERS = []
+DEFAULT_INTERVAL = 30  # seconds
+SYNC_ACTION_TIMEOUT = 60  # seconds, retry budget of the API calls of a sync action
 WAIT_BEFORE_STATUS_CHECK = 10  # seconds
 RATE_LIMIT_MAX_RETRIES = 10
 RATE_LIMIT_DEFAULT_WAIT = 60  # seconds
 NO_FAILURE_DETAIL = "no error detail provided by the PowerBI API"
+DATAFLOW_SUCCESS_STATUSES = ("Success", "Completed")
+DATAFLOW_FAILURE_STATUSES = ("Failed", "Cancelled", "Canceled")
+# the dataflow refresh POST returns no transaction ID, the transaction is matched by its start time
+DATAFLOW_CLOCK_SKEW = 5  # seconds the Power BI clock may be behind ours
+CANCEL_MAX_WORKERS = 8
+CANCEL_REQUEST_TIMEOUT = 15  # seconds, per cancel request
+CANCEL_TOTAL_TIMEOUT = 30  # seconds, for the whole cancel round
+# Only enhanced refreshes can be cancelled, see
+# https://learn.microsoft.com/en-us/power-bi/connect-data/asynchronous-refresh#delete-refreshesrefreshid
+# A full refresh of the whole model, as the standard refresh does.
+ENHANCED_REFRESH_PAYLOAD = {"type": "Full"}
+PROGRESS_LOG_INTERVAL = 60  # seconds between progress summaries when no dataset changed its state
+HTTP_RETRY_MAX_ATTEMPTS = 5  # attempts of a request failing with a retryable server or connection error
+HTTP_RETRY_BASE_DELAY = 1  # seconds, full-jitter backoff base
+HTTP_RETRY_MAX_DELAY = 30  # seconds, full-jitter backoff cap
+IDEMPOTENT_METHODS = ("get", "delete")
+# A POST is retried only when the API certainly did not start the refresh: 503 means the request was not
+# accepted, 429 is handled separately with Retry-After. Other 5xx may come after the refresh was queued.
+POST_RETRYABLE_STATUSES = (503,)
+CIRCUIT_FAILURE_THRESHOLD = 5  # consecutive 5xx or connection errors that open the circuit of an endpoint
+CIRCUIT_COOLDOWN = 30  # seconds an open circuit waits before its single half-open probe
+# IDs in PowerBI API paths, replaced so that all datasets share the circuit of an endpoint
+API_ID_PATTERN = re.compile(r"/(groups|datasets|refreshes|dataflows|transactions)/[^/?]+")
+RETRY_BASE_DELAY = 60  # seconds before the first re-trigger of a transiently failed refresh
+RETRY_MAX_DELAY = 600  # seconds
+# Markers are matched against the lower-cased errorCode/errorDescription of `serviceExceptionJson` with
+# separators removed. Permanent markers win, so e.g. a gateway credential error is never retried.
+PERMANENT_FAILURE_MARKERS = ("credential", "unauthorized", "forbidden", "permission", "notfound", "invalid", "syntax")
+RETRYABLE_FAILURE_MARKERS = (
+    "timeout",
+    "timedout",
+    "gatewayunreachable",
+    "gatewaynotreachable",
+    "unreachable",
+    "capacity",
+    "overload",
+    "throttl",
+    "serviceunavailable",
+    "temporar",
+)
 # Entra accepts either a tenant GUID or a domain name as the authority. Anything with URL
 # structure (scheme, slash, query, fragment, whitespace) would silently mis-target the token
 # endpoint, so it is rejected up front rather than sent to Microsoft.
@@ -43,6 +101,114 @@ class TooManyRequestsError(Exception):
         super().__init__(f"Rate limited by PowerBI API (HTTP 429). Retry after: {retry_after}s")
 
 
+class PowerBIOutageError(UserException):
+    """Raised when the circuit of a PowerBI API endpoint stays open after its half-open probe failed."""
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        super().__init__(
+            f"PowerBI API appears to be unavailable: {endpoint} failed {CIRCUIT_FAILURE_THRESHOLD} consecutive "
+            f"times with a server or connection error and still failed after {CIRCUIT_COOLDOWN} seconds. "
+            f"Check https://support.fabric.microsoft.com/support for an ongoing incident and run the job again later."
+        )
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker of a single API endpoint.
+
+    Closed, it counts consecutive failures and opens at `threshold`. Open, the next caller waits for the
+    rest of the cooldown and is let through as the single half-open probe, while concurrent callers fail
+    with a `ConnectionError`. A successful probe closes the circuit; a failed one trips it for the rest of
+    the job, so every further request fails immediately with `PowerBIOutageError` instead of retrying.
+    """
+
+    def __init__(self, endpoint: str, threshold: int = CIRCUIT_FAILURE_THRESHOLD, cooldown: float = CIRCUIT_COOLDOWN):
+        self.endpoint = endpoint
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.probing = False
+        self.tripped = False
+        self._lock = threading.Lock()
+
+    def before_request(self, deadline: float = float("inf")) -> None:
+        with self._lock:
+            if self.tripped:
+                raise PowerBIOutageError(self.endpoint)
+            if self.probing:
+                # another request is probing, the outage is only confirmed once that probe fails
+                raise requests.exceptions.ConnectionError(f"Circuit of {self.endpoint} is open.")
+            if self.opened_at is None:
+                return
+            wait_for = self.opened_at + self.cooldown - time.monotonic()
+            if time.time() + wait_for > deadline:
+                raise requests.exceptions.Timeout(f"Circuit of {self.endpoint} is open beyond the request deadline.")
+            self.probing = True
+
+        if wait_for > 0:
+            logging.warning(f"Circuit of {self.endpoint} is open, probing again in {wait_for:.0f} seconds.")
+            time.sleep(wait_for)
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.probing:
+                logging.info(f"Circuit of {self.endpoint} closed, the PowerBI API responds again.")
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            if self.probing:
+                self.probing = False
+                self.tripped = True
+                raise PowerBIOutageError(self.endpoint)
+            self.failures += 1
+            if self.failures >= self.threshold and self.opened_at is None:
+                logging.warning(f"Circuit of {self.endpoint} opened after {self.failures} consecutive failures.")
+                self.opened_at = time.monotonic()
+
+
+class ProgressReporter:
+    """
+    Keeps the last known refresh state of every polled dataset and logs aggregate progress.
+
+    A dataset is logged individually only when its state changes. The aggregate summary is logged after
+    a poll cycle in which any state changed, otherwise at most once per `min_interval` seconds, so the
+    log volume grows with the number of transitions rather than with datasets times poll cycles.
+    """
+
+    def __init__(self, name_resolver: Callable[[str], str], min_interval: float = PROGRESS_LOG_INTERVAL):
+        self._name_resolver = name_resolver
+        self._min_interval = min_interval
+        self._states: dict[str, str] = {}
+        self._changed = False
+        self._last_report = float("-inf")
+
+    def update(self, dataset_id: str, state: str) -> None:
+        previous = self._states.get(dataset_id)
+        if previous == state:
+            return
+        self._states[dataset_id] = state
+        self._changed = True
+        if previous:
+            logging.info(f"Dataset {self._name_resolver(dataset_id)}: {previous} -> {state}")
+        else:
+            logging.info(f"Dataset {self._name_resolver(dataset_id)}: {state}")
+
+    def report(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not (force or self._changed or now - self._last_report >= self._min_interval):
+            return
+        counts = Counter(self._states.values())
+        summary = ", ".join(f"{state}: {count}" for state, count in sorted(counts.items()))
+        logging.info(f"Refresh progress ({len(self._states)} datasets) - {summary}")
+        self._changed = False
+        self._last_report = now
+
+
 class Component(ComponentBase):
     def __init__(self):
         super().__init__()
@@ -58,28 +224,91 @@ class Component(ComponentBase):
 
         self.workspace = parameters.get("workspace")
         self.tenant_id = self._resolve_tenant_id(parameters.get(KEY_TENANT_ID))
-        self.wait = parameters.get("wait", "No") == "Yes"
-        self.timeout = time.time() + parameters.get("timeout", 7200)
-        self.interval = parameters.get("interval")
-        self.alldatasets = parameters.get("alldatasets", "No") == "Yes"
+        self.service_principal = parameters.get(KEY_AUTH_TYPE) == AUTH_TYPE_SERVICE_PRINCIPAL
+        self.sp_token_state: dict = {}
+        # run() replaces this with the configured timeout, sync actions only need a short retry budget
+        self.timeout = time.time() + SYNC_ACTION_TIMEOUT
+        self.in_state: dict | None = None
 
         self.success_list = []
         self.failed_list = []
         self.requestid_array = []
+        self.cancelled_list = []
+        self.cancel_failed_list = []
+        self.retry_counts: dict[str, int] = {}
+        self.retry_queue: list[tuple[str, float]] = []
+        # refreshes triggered while polling by request ID, the refresh history lists them only after a while
+        self.request_triggered_at: dict[str, float] = {}
+        self.skipped_list = []
+        self.quota_ledger: dict | None = None
         self.dataset_names: dict[str, str] = {}
+        self.dataset_refreshable: dict[str, bool] | None = None
+        self.circuit_breakers: dict[str, CircuitBreaker] = {}
+        self.dataflow_ids: list[str] = []
+        self.dataflow_names: dict[str, str] = {}
+        self.dataflow_requests: list[list] = []
+        self.gated_datasets: dict[str, set[str]] = {}
+        self.failed_dataflows = []
+
+    def _init_run_parameters(self) -> None:
+        """Parses the parameters only the run action uses, so sync actions do not pay for or fail on them."""
+        parameters = self.configuration.parameters
+
+        self.wait = parameters.get("wait", "No") == "Yes"
+        self.timeout = time.time() + parameters.get("timeout", 7200)
+        self.interval = parameters.get("interval") or DEFAULT_INTERVAL
+        self.alldatasets = parameters.get("alldatasets", "No") == "Yes"
+        self.cancel_on_failure = parameters.get("cancel_on_failure", "No") == "Yes"
+        self.failed_refresh_retries = int(parameters.get("failed_refresh_retries") or 0)
+        # https://learn.microsoft.com/en-us/rest/api/power-bi/datasets/refresh-dataset-in-group#limitations
+        self.daily_refresh_limit = int(parameters.get("daily_refresh_limit") or 0)
+        self.skip_invalid_datasets = parameters.get("invalid_datasets", "Fail") == "Skip"
+        self.dataflow_ids = [dataflow for dataflow in parameters.get(KEY_DATAFLOW) or [] if dataflow]
+        if self.dataflow_ids and not self.workspace:
+            raise UserException("Dataflows can only be refreshed in a workspace. Please select the PowerBI workspace.")
 
     def _client_init(self):
+        if self.service_principal:
+            self.header = self.get_service_principal_token()
+            return
+
         self.authorization = self.configuration.config_data["authorization"]
         access_token, self.refresh_token = self.get_oauth_token()
-        self.write_state_file(
-            {
-                STATE_REFRESH_TOKEN: self.refresh_token,
-                STATE_AUTH_ID: self.authorization.get("oauth_api", {}).get("credentials", {}).get("id", ""),
-            }
-        )
+        in_state = self._get_in_state()
+        # the state is only written when the token rotated or the authorization changed
+        if self.refresh_token != in_state.get(STATE_REFRESH_TOKEN) or self._auth_id() != in_state.get(STATE_AUTH_ID):
+            self._write_state()
 
         self.header = access_token
 
+    def _get_in_state(self) -> dict:
+        """Returns the input state file, read only once per job."""
+        if getattr(self, "in_state", None) is None:
+            self.in_state = self.get_state_file()
+        return self.in_state
+
+    def _auth_id(self) -> str:
+        return self.authorization.get("oauth_api", {}).get("credentials", {}).get("id", "")
+
+    def _renew_access_token(self) -> None:
+        """Replaces an access token the API reported as expired."""
+        if self.service_principal:
+            self.header = self.get_service_principal_token(use_cached=False)
+        else:
+            access_token, _ = self.get_oauth_token()
+            self.header = access_token
+
+    def _write_state(self) -> None:
+        # keys this action does not manage (e.g. the quota ledger during a sync action) are carried over
+        state = dict(self._get_in_state())
+        if self.service_principal:
+            state.update(self.sp_token_state)
+        else:
+            state.update({STATE_REFRESH_TOKEN: self.refresh_token, STATE_AUTH_ID: self._auth_id()})
+        if self.quota_ledger is not None:
+            state[STATE_REFRESH_QUOTA] = self.quota_ledger
+        self.write_state_file(state)
+
     def _get_dataset_name(self, dataset_id: str) -> str:
         """Returns a display string with the dataset name if available, otherwise just the ID."""
         name = getattr(self, "dataset_names", {}).get(dataset_id)
@@ -88,47 +317,390 @@ class Component(ComponentBase):
         return dataset_id
 
     def _load_dataset_names(self, group_url: str) -> None:
-        """Fetches dataset names from the PowerBI API to enrich log and error messages."""
+        """
+        Fetches the workspace datasets from the PowerBI API to enrich log and error messages. The same list
+        is kept for the pre-flight validation in `validate_datasets`.
+        """
         try:
             refresh_url = f"https://api.powerbi.com/v1.0/myorg/{group_url}/datasets"
             response = self._get_request(refresh_url)
             response.raise_for_status()
+            refreshable = {}
             for ds in response.json().get("value", []):
                 self.dataset_names[ds["id"]] = ds["name"]
+                refreshable[self._normalize_id(ds["id"])] = ds.get("isRefreshable", True)
+            self.dataset_refreshable = refreshable
         except Exception as e:
             logging.warning(f"Could not fetch dataset names: {e}")
 
+    @staticmethod
+    def _normalize_id(object_id) -> str:
+        """PowerBI accepts GUIDs in any case and lists them in lower case."""
+        return str(object_id).strip().lower()
+
+    def validate_datasets(self) -> None:
+        """
+        Validates all configured dataset IDs against the workspace dataset list before any refresh is
+        triggered, instead of finding unknown IDs one failing POST at a time.
+
+        Raises:
+            UserException: If any dataset is missing or not refreshable and invalid datasets are not skipped,
+                or if no valid dataset remains.
+        """
+        if self.dataset_refreshable is None:
+            logging.warning("Dataset list of the workspace is not available, skipping dataset validation.")
+            return
+
+        dataset_ids = [dataset["dataset_input"] for dataset in self.dataset_array]
+        missing = [d for d in dataset_ids if self._normalize_id(d) not in self.dataset_refreshable]
+        not_refreshable = [
+            self._get_dataset_name(d)
+            for d in dataset_ids
+            if self.dataset_refreshable.get(self._normalize_id(d)) is False
+        ]
+        if not missing and not not_refreshable:
+            return
+
+        problems = []
+        if missing:
+            problems.append(f"not found or not accessible in the workspace: {missing}")
+        if not_refreshable:
+            problems.append(f"not refreshable: {not_refreshable}")
+        message = f"Invalid datasets in the configuration, {'; '.join(problems)}"
+
+        if not self.skip_invalid_datasets:
+            raise UserException(f"{message}. Fix the dataset list or set invalid datasets to be skipped.")
+
+        self.dataset_array = [
+            d for d in self.dataset_array if self.dataset_refreshable.get(self._normalize_id(d["dataset_input"]))
+        ]
+        if not self.dataset_array:
+            raise UserException(f"{message}. No valid dataset left to refresh.")
+        logging.warning(f"{message}. These datasets are skipped.")
+
     def run(self):
+        self._init_run_parameters()
+        self._load_quota_ledger()
         self._client_init()
         self.load_datasets()
         self.check_dataset_inputs()
 
         group_url = f"groups/{self.workspace}" if self.workspace else ""
         self._load_dataset_names(group_url)
+        self.validate_datasets()
 
         logging.info(f"Processing datasets: {self.dataset_array}")
+        try:
+            self.start_dataflows(group_url)
+            for dataset in self.dataset_array:
+                dataset_id = dataset["dataset_input"]
+                if dataset_id in self.gated_datasets or dataset_id in self.failed_list:
+                    continue
+                self._trigger_dataset(group_url, dataset_id)
+
+            if self.wait and (self.requestid_array or self.dataflow_requests):
+                time.sleep(WAIT_BEFORE_STATUS_CHECK)  # wait for the initial requests to be processed
+                logging.debug(f"Waiting for dataset refreshes to finish. Timeout: {self.timeout}")
+                self.check_status(group_url)
+            elif not self.wait:
+                self._wait_for_dataflows(group_url)
+                logging.info(f"List refreshed: {[self._get_dataset_name(d) for d in self.success_list]}")
+        finally:
+            if self.quota_ledger is not None:
+                self._report_refresh_quota()
+                self._write_state()
+
+        if self.skipped_list:
+            logging.warning(
+                f"Skipped, daily refresh quota exhausted: {[self._get_dataset_name(d) for d in self.skipped_list]}"
+            )
+
+        if self.retry_counts:
+            logging.info(f"Retried: {[self._get_dataset_name(d) for d in self.retry_counts]}")
+
+        if self.failed_dataflows:
+            failed_display = [self._get_dataflow_name(d) for d in self.failed_dataflows]
+            logging.error(f"Failed to refresh dataflows: {failed_display}")
+
+        if self.failed_list or self.failed_dataflows:
+            failed_display = [self._get_dataset_name(d) for d in self.failed_list]
+            failed_display += [self._get_dataflow_name(d) for d in self.failed_dataflows]
+            raise UserException(f"Any of dataset refreshes finished with error. {failed_display}")
+
+        logging.info("PowerBI Refresh finished")
+
+    def _trigger_dataset(self, group_url, dataset_id, polling: bool = False) -> None:
+        if not self._has_refresh_quota(group_url, dataset_id):
+            self.skipped_list.append(dataset_id)
+            return
+        logging.info(f"Refreshing dataset {self._get_dataset_name(dataset_id)}")
+        response = self.refresh_dataset(group_url, dataset_id, enhanced=self.cancel_on_failure)
+        if response:
+            self._count_refresh(dataset_id)
+            self.success_list.append(dataset_id)
+            request_id = self._get_refresh_id(response)
+            if polling:
+                # run() waits before the first status check only for the refreshes it triggers itself
+                self.request_triggered_at[request_id] = time.time()
+            self.requestid_array.append([dataset_id, request_id])
+        else:
+            self.failed_list.append(dataset_id)
+
+    def _get_dataflow_name(self, dataflow_id: str) -> str:
+        """Returns a display string with the dataflow name if available, otherwise just the ID."""
+        name = getattr(self, "dataflow_names", {}).get(dataflow_id)
+        if name:
+            return f"dataflow '{name}' ({dataflow_id})"
+        return f"dataflow {dataflow_id}"
+
+    def _load_dataflow_names(self, group_url: str) -> None:
+        """Fetches dataflow names from the PowerBI API to enrich log and error messages."""
+        try:
+            response = self._get_request(f"https://api.powerbi.com/v1.0/myorg/{group_url}/dataflows")
+            response.raise_for_status()
+            for dataflow in response.json().get("value", []):
+                self.dataflow_names[dataflow["objectId"]] = dataflow["name"]
+        except Exception as e:
+            logging.warning(f"Could not fetch dataflow names: {e}")
+
+    def _load_dataflow_dependencies(self, group_url: str) -> dict[str, set[str]] | None:
+        """
+        Uses https://learn.microsoft.com/en-us/rest/api/power-bi/datasets/get-dataset-to-dataflows-links-in-group
+        to map each dataset to the dataflows it reads from, both by normalized ID. Returns None when the links
+        are not available.
+        """
+        try:
+            response = self._get_request(f"https://api.powerbi.com/v1.0/myorg/{group_url}/datasets/upstreamDataflows")
+            response.raise_for_status()
+            links = response.json().get("value", [])
+        except Exception as e:
+            logging.warning(f"Could not fetch the dataflows the datasets depend on: {e}")
+            return None
+
+        dependencies: dict[str, set[str]] = {}
+        for link in links:
+            dataset_id = self._normalize_id(link["datasetObjectId"])
+            dependencies.setdefault(dataset_id, set()).add(self._normalize_id(link["dataflowObjectId"]))
+        return dependencies
+
+    def start_dataflows(self, group_url) -> None:
+        """
+        Triggers the configured dataflows and holds back every dataset that depends on any of them. A held
+        dataset is triggered as soon as its own upstream dataflows are refreshed, see `_release_datasets`.
+        If the dataset to dataflow links cannot be read, every dataset waits for all configured dataflows.
+        """
+        if not self.dataflow_ids:
+            return
+
+        self._load_dataflow_names(group_url)
+        dependencies = self._load_dataflow_dependencies(group_url)
         for dataset in self.dataset_array:
             dataset_id = dataset["dataset_input"]
-            logging.info(f"Refreshing dataset {self._get_dataset_name(dataset_id)}")
-            response = self.refresh_dataset(group_url, dataset_id)
-            if response:
-                self.success_list.append(dataset_id)
-                self.requestid_array.append([dataset_id, response.headers["RequestId"]])
+            if dependencies is None:
+                upstream = set(self.dataflow_ids)
+            else:
+                linked = dependencies.get(self._normalize_id(dataset_id), set())
+                upstream = {d for d in self.dataflow_ids if self._normalize_id(d) in linked}
+            if upstream:
+                self.gated_datasets[dataset_id] = set(upstream)
+                upstream_display = [self._get_dataflow_name(d) for d in upstream]
+                logging.info(f"Dataset {self._get_dataset_name(dataset_id)} waits for {upstream_display}")
+
+        for dataflow_id in self.dataflow_ids:
+            triggered_at = datetime.now(UTC)
+            if self.refresh_dataflow(group_url, dataflow_id):
+                self.dataflow_requests.append([dataflow_id, triggered_at])
             else:
+                self._dataflow_failed(dataflow_id)
+
+    def refresh_dataflow(self, group_url, dataflow) -> bool:
+        """Uses https://learn.microsoft.com/en-us/rest/api/power-bi/dataflows/refresh-dataflow"""
+        refresh_url = f"https://api.powerbi.com/v1.0/myorg/{group_url}/dataflows/{dataflow}/refreshes"
+        payload = {"notifyOption": "MailOnFailure"}
+
+        try:
+            r = self._send("post", refresh_url, headers=self.header, json=payload)
+            if r.status_code in (200, 202):
+                logging.info(f"Refresh of {self._get_dataflow_name(dataflow)} accepted by PowerBI API.")
+                return True
+            msg = json.loads(r.text)
+            logging.error(
+                f"Failed to refresh {self._get_dataflow_name(dataflow)}: error code: {msg['error']['code']} "
+                f"message: {msg['error']['message']}"
+            )
+            return False
+
+        except (TooManyRequestsError, PowerBIOutageError):
+            raise
+        except Exception as e:
+            logging.error(f"Dataflow refresh failed. Exception: {e}")
+            return False
+
+    def dataflow_status(self, dataflow_id, group_url):
+        """Uses https://learn.microsoft.com/en-us/rest/api/power-bi/dataflows/get-dataflow-transactions"""
+        return self._get_request(f"https://api.powerbi.com/v1.0/myorg/{group_url}/dataflows/{dataflow_id}/transactions")
+
+    @staticmethod
+    def _parse_api_time(value) -> datetime | None:
+        try:
+            parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=UTC)
+
+    def process_dataflow_status(self, response, dataflow_id, triggered_at: datetime) -> str:
+        """Returns Running, Refreshed or Failed for the transaction started by the trigger of this job."""
+        if response.status_code != 200:
+            raise UserException(
+                f"Failed to get the refresh status of {self._get_dataflow_name(dataflow_id)} "
+                f"with status code: {response.status_code} and message: {response.text}"
+            )
+
+        since = triggered_at - timedelta(seconds=DATAFLOW_CLOCK_SKEW)
+        started = [
+            (start_time, transaction)
+            for transaction in response.json().get("value", [])
+            if (start_time := self._parse_api_time(transaction.get("startTime")))
+            and start_time >= since
+            and not self._finished_before(transaction, triggered_at)
+        ]
+        if not started:
+            return "Running"  # the transaction is not listed yet
+
+        status = max(started, key=lambda item: item[0])[1].get("status")
+        if status in DATAFLOW_SUCCESS_STATUSES:
+            return "Refreshed"
+        if status in DATAFLOW_FAILURE_STATUSES:
+            return "Failed"
+        return "Running"
+
+    def _finished_before(self, transaction: dict, triggered_at: datetime) -> bool:
+        """Tells whether a terminal transaction ended before the trigger, so another run started it."""
+        if transaction.get("status") not in DATAFLOW_SUCCESS_STATUSES + DATAFLOW_FAILURE_STATUSES:
+            return False
+        end_time = self._parse_api_time(transaction.get("endTime"))
+        return end_time is not None and end_time < triggered_at
+
+    def _poll_dataflows(self, group_url) -> None:
+        for dataflow_request in list(self.dataflow_requests):
+            dataflow_id, triggered_at = dataflow_request
+            try:
+                response = self.dataflow_status(dataflow_id, group_url)
+            except (RequestException, TooManyRequestsError) as e:
+                raise UserException(f"Dataflow refresh status check failed with exception: {e}")
+
+            state = self.process_dataflow_status(response, dataflow_id, triggered_at)
+            if state == "Running":
+                continue
+
+            self.dataflow_requests.remove(dataflow_request)
+            logging.info(f"Refresh of {self._get_dataflow_name(dataflow_id)}: {state}")
+            if state == "Refreshed":
+                self._release_datasets(group_url, dataflow_id)
+            else:
+                self._dataflow_failed(dataflow_id)
+                if not self.alldatasets:
+                    raise UserException(f"Refresh of {self._get_dataflow_name(dataflow_id)} finished with error")
+
+    def _release_datasets(self, group_url, dataflow_id) -> None:
+        """Triggers the held datasets whose last pending upstream dataflow has just been refreshed."""
+        for dataset_id, upstream in list(self.gated_datasets.items()):
+            upstream.discard(dataflow_id)
+            if not upstream:
+                del self.gated_datasets[dataset_id]
+                logging.info(f"Upstream dataflows of dataset {self._get_dataset_name(dataset_id)} are refreshed.")
+                self._trigger_dataset(group_url, dataset_id, polling=True)
+
+    def _dataflow_failed(self, dataflow_id) -> None:
+        self.failed_dataflows.append(dataflow_id)
+        for dataset_id, upstream in list(self.gated_datasets.items()):
+            if dataflow_id in upstream:
+                del self.gated_datasets[dataset_id]
                 self.failed_list.append(dataset_id)
+                logging.error(
+                    f"Dataset {self._get_dataset_name(dataset_id)} is not refreshed, "
+                    f"its upstream {self._get_dataflow_name(dataflow_id)} failed."
+                )
 
-        if self.wait:
-            time.sleep(WAIT_BEFORE_STATUS_CHECK)  # wait for the initial requests to be processed
-            logging.debug(f"Waiting for dataset refreshes to finish. Timeout: {self.timeout}")
-            self.check_status(group_url)
-        else:
-            logging.info(f"List refreshed: {[self._get_dataset_name(d) for d in self.success_list]}")
+    def _wait_for_dataflows(self, group_url) -> None:
+        """Without waiting for datasets, polls dataflows only until every held dataset has been triggered."""
+        while self.gated_datasets and self.dataflow_requests and time.time() < self.timeout:
+            time.sleep(self.interval)
+            self._poll_dataflows(group_url)
+        self._fail_gated_datasets()
 
-        if self.failed_list:
-            failed_display = [self._get_dataset_name(d) for d in self.failed_list]
-            raise UserException(f"Any of dataset refreshes finished with error. {failed_display}")
+    def _fail_gated_datasets(self) -> None:
+        for dataset_id in self.gated_datasets:
+            logging.error(
+                f"Dataset {self._get_dataset_name(dataset_id)} is not refreshed, "
+                f"its upstream dataflows did not finish before the timeout."
+            )
+            self.failed_list.append(dataset_id)
+        self.gated_datasets = {}
 
-        logging.info("PowerBI Refresh finished")
+    def _load_quota_ledger(self) -> None:
+        """
+        Loads the per-dataset count of API triggered refreshes for the current UTC day from the state file.
+        The ledger is kept only when `daily_refresh_limit` is set; a ledger from a previous day is discarded.
+        """
+        if not self.daily_refresh_limit:
+            return
+
+        today = datetime.now(UTC).date().isoformat()
+        ledger = self._get_in_state().get(STATE_REFRESH_QUOTA) or {}
+        if ledger.get("date") != today or not isinstance(ledger.get("counts"), dict):
+            ledger = {"date": today, "counts": {}}
+        self.quota_ledger = ledger
+
+    def _seed_refresh_count(self, group_url, dataset_id) -> int:
+        """Counts today's API triggered refreshes in the refresh history of a dataset missing in the ledger."""
+        try:
+            response = self.refresh_status(dataset_id, group_url)
+            response.raise_for_status()
+            entries = response.json().get("value", [])
+        except Exception as e:
+            logging.warning(
+                f"Could not read refresh history of dataset {self._get_dataset_name(dataset_id)} "
+                f"to seed the daily refresh quota: {e}"
+            )
+            return 0
+
+        today = self.quota_ledger["date"]
+        return sum(
+            1
+            for entry in entries
+            if entry.get("refreshType") == "ViaApi" and str(entry.get("startTime", "")).startswith(today)
+        )
+
+    def _has_refresh_quota(self, group_url, dataset_id) -> bool:
+        """Returns False, without triggering anything, when the dataset used up its daily refresh quota."""
+        if self.quota_ledger is None:
+            return True
+
+        counts = self.quota_ledger["counts"]
+        if dataset_id not in counts:
+            counts[dataset_id] = self._seed_refresh_count(group_url, dataset_id)
+
+        if counts[dataset_id] >= self.daily_refresh_limit:
+            logging.warning(
+                f"Dataset {self._get_dataset_name(dataset_id)} reached the daily refresh quota "
+                f"({counts[dataset_id]}/{self.daily_refresh_limit} in UTC day {self.quota_ledger['date']}). "
+                f"Refresh skipped."
+            )
+            return False
+        return True
+
+    def _count_refresh(self, dataset_id) -> None:
+        if self.quota_ledger is not None:
+            counts = self.quota_ledger["counts"]
+            counts[dataset_id] = counts.get(dataset_id, 0) + 1
+
+    def _report_refresh_quota(self) -> None:
+        remaining = {
+            self._get_dataset_name(dataset_id): max(self.daily_refresh_limit - count, 0)
+            for dataset_id, count in self.quota_ledger["counts"].items()
+        }
+        logging.info(f"Remaining daily refresh quota (UTC day {self.quota_ledger['date']}): {remaining}")
 
     @property
     def header(self):
@@ -171,7 +743,7 @@ class Component(ComponentBase):
         client_id = credentials["appKey"]
         client_secret = credentials["#appSecret"]
         encrypted_data = json.loads(credentials["#data"])
-        state_file = self.get_state_file()
+        state_file = self._get_in_state()
         refresh_token = state_file.get(STATE_REFRESH_TOKEN, [])
         auth_id = state_file.get(STATE_AUTH_ID, [])
 
@@ -180,6 +752,47 @@ class Component(ComponentBase):
 
         return response["access_token"], response["refresh_token"]
 
+    def get_service_principal_token(self, use_cached: bool = True) -> str:
+        """
+        Returns an app-only access token for the configured service principal.
+
+        Unlike the delegated flow there is no refresh token to rotate, so concurrent jobs of the same
+        configuration do not depend on each other. The token is cached in the state file until shortly
+        before its expiry and the state file is only written when a new token was issued.
+        """
+        parameters = self.configuration.parameters
+        client_id = parameters.get(KEY_SP_CLIENT_ID)
+        client_secret = parameters.get(KEY_SP_CLIENT_SECRET)
+        if not client_id or not client_secret:
+            raise UserException("Service principal authentication requires the application (client) ID and secret.")
+        if self.tenant_id == DEFAULT_AUTHORITY:
+            raise UserException("Service principal authentication requires the Tenant ID of the PowerBI tenant.")
+
+        sp_id = f"{self.tenant_id}/{client_id}"
+        state_file = self._get_in_state()
+        if (
+            use_cached
+            and state_file.get(STATE_SP_ID) == sp_id
+            and state_file.get(STATE_SP_TOKEN)
+            and float(state_file.get(STATE_SP_TOKEN_EXPIRES_ON) or 0) - time.time() > TOKEN_EXPIRY_MARGIN
+        ):
+            logging.info("Service principal token loaded from state file")
+            self.sp_token_state = {
+                key: state_file[key] for key in (STATE_SP_ID, STATE_SP_TOKEN, STATE_SP_TOKEN_EXPIRES_ON)
+            }
+            return state_file[STATE_SP_TOKEN]
+
+        response = self._request_service_principal_token(client_id, client_secret, self.tenant_id)
+        expires_on = response.get("expires_on") or time.time() + float(response.get("expires_in") or 0)
+        self.sp_token_state = {
+            STATE_SP_ID: sp_id,
+            STATE_SP_TOKEN: response["access_token"],
+            STATE_SP_TOKEN_EXPIRES_ON: float(expires_on),
+        }
+        logging.info("Service principal token issued")
+        self._write_state()
+        return response["access_token"]
+
     @staticmethod
     def _get_refresh_token(auth_id, refresh_token, encrypted_data, credentials):
         """Determines the correct refresh token to use."""
@@ -215,26 +828,42 @@ class Component(ComponentBase):
         return tenant_id
 
     @staticmethod
-    @backoff.on_exception(backoff.expo, RequestException, max_tries=3)
     def _request_new_token(client_id, client_secret, refresh_token, tenant_id=DEFAULT_AUTHORITY):
-        """Requests a new access token using the refresh token from the given tenant authority.
-
-        The token endpoint is the first network call the component makes, and it was the only
-        HTTP call here without a retry, so a transient connection reset ended the whole job as
-        an opaque internal error (exit 2). The bounded backoff matches the one already used by
-        `_get_request` and re-raises after the last attempt, so a persistent outage still fails
-        the job. A non-200 response is not a `RequestException`, so it is still reported
-        immediately as a `UserException` without any retry.
-        """
-        url = f"https://login.microsoftonline.com/{tenant_id or DEFAULT_AUTHORITY}/oauth2/token"
-        headers = {"Content-Type": "application/x-www-form-urlencoded"}
+        """Requests a new access token using the refresh token from the given tenant authority."""
         payload = {
             "client_id": client_id,
             "client_secret": client_secret,
             "grant_type": "refresh_token",
-            "resource": "https://analysis.windows.net/powerbi/api",
+            "resource": POWERBI_RESOURCE,
             "refresh_token": refresh_token,
         }
+        return Component._post_token_request(payload, tenant_id)
+
+    @staticmethod
+    def _request_service_principal_token(client_id, client_secret, tenant_id):
+        """Requests an app-only access token with the client credentials grant."""
+        payload = {
+            "client_id": client_id,
+            "client_secret": client_secret,
+            "grant_type": "client_credentials",
+            "resource": POWERBI_RESOURCE,
+        }
+        return Component._post_token_request(payload, tenant_id)
+
+    @staticmethod
+    @backoff.on_exception(backoff.expo, RequestException, max_tries=3)
+    def _post_token_request(payload, tenant_id=DEFAULT_AUTHORITY):
+        """Posts a token request to the given tenant authority and returns the parsed token response.
+
+        The token endpoint is the first network call the component makes, so a transient
+        connection reset would end the whole job as an opaque internal error (exit 2). Connection
+        errors are therefore retried with a bounded backoff that re-raises after the last
+        attempt, so a persistent outage still fails the job. A non-200 response is
+        not a `RequestException`, so it is still reported immediately as a `UserException`
+        without any retry.
+        """
+        url = f"https://login.microsoftonline.com/{tenant_id or DEFAULT_AUTHORITY}/oauth2/token"
+        headers = {"Content-Type": "application/x-www-form-urlencoded"}
 
         response = requests.post(url, headers=headers, data=payload)
         if response.status_code != 200:
@@ -268,37 +897,148 @@ class Component(ComponentBase):
             logging.warning(f"Rate limited by PowerBI API (HTTP 429). Retry after {retry_after} seconds.")
             raise TooManyRequestsError(retry_after=retry_after)
 
-    @backoff.on_exception(backoff.expo, Exception, max_tries=3, giveup=lambda e: isinstance(e, TooManyRequestsError))
-    @backoff.on_exception(
-        backoff.runtime,
-        TooManyRequestsError,
-        value=lambda exc: exc.retry_after if exc.retry_after is not None else RATE_LIMIT_DEFAULT_WAIT,
-        jitter=None,
-        max_tries=RATE_LIMIT_MAX_RETRIES,
-    )
-    def refresh_dataset(self, group_url, dataset) -> requests.models.Response | bool:
+    def _circuit_breaker(self, method: str, url: str) -> CircuitBreaker:
+        path = API_ID_PATTERN.sub(r"/\1/{id}", url.split("?")[0])
+        endpoint = f"{method.upper()} {path}"
+        if endpoint not in self.circuit_breakers:
+            self.circuit_breakers[endpoint] = CircuitBreaker(endpoint)
+        return self.circuit_breakers[endpoint]
+
+    def _send(self, method: str, url: str, deadline: float | None = None, **kwargs) -> requests.models.Response:
+        """
+        Sends a PowerBI API request through the circuit breaker of its endpoint and the central retry policy.
+
+        Outcomes are classified as follows:
+          - 429: waits for Retry-After, up to RATE_LIMIT_MAX_RETRIES times, then raises TooManyRequestsError.
+          - 403 TokenExpired: renews the access token and repeats the request once.
+          - 5xx and connection errors: retried with full-jitter backoff, up to HTTP_RETRY_MAX_ATTEMPTS attempts.
+            A POST is not idempotent, so it is only retried when the request certainly did not start anything.
+          - Anything else, including permanent 4xx errors, is returned to the caller immediately.
+        No retry wait ends after the job timeout, the remaining time is the retry budget of the request. A
+        `deadline` given by the caller replaces the job timeout and also bounds the wait for an open circuit
+        and the timeout of every attempt, so the whole call ends by then.
+        """
+        breaker = self._circuit_breaker(method, url)
+        local_deadline = deadline is not None
+        deadline = deadline if local_deadline else self.timeout
+        request_timeout = kwargs.get("timeout")
+        idempotent = method in IDEMPOTENT_METHODS
+        attempt = 1
+        rate_limited = 0
+        token_renewed = False
+
+        while True:
+            if local_deadline:
+                breaker.before_request(deadline)
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise requests.exceptions.Timeout(f"{method.upper()} {url} not sent, its deadline has passed.")
+                kwargs["timeout"] = min(request_timeout or remaining, remaining)
+            else:
+                breaker.before_request()
+            try:
+                response = getattr(requests, method)(url, **kwargs)
+            except RequestException as e:
+                breaker.record_failure()
+                retryable = idempotent or isinstance(e, requests.exceptions.ConnectTimeout)
+                if not retryable or not self._wait_before_retry(method, url, attempt, deadline, e):
+                    raise
+                attempt += 1
+                continue
+
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+
+            try:
+                self._check_rate_limit(response)
+            except TooManyRequestsError as e:
+                rate_limited += 1
+                if rate_limited >= RATE_LIMIT_MAX_RETRIES or time.time() + e.retry_after > deadline:
+                    raise
+                time.sleep(e.retry_after)
+                continue
+
+            if not token_renewed and self._is_token_expired(response):
+                logging.info("Access token expired, requesting a new one.")
+                token_renewed = True
+                self._renew_access_token()
+                kwargs["headers"] = self.header
+                continue
+
+            status = response.status_code
+            retryable = status >= 500 if idempotent else status in POST_RETRYABLE_STATUSES
+            if retryable and self._wait_before_retry(method, url, attempt, deadline, f"HTTP {status}"):
+                attempt += 1
+                continue
+
+            return response
+
+    @staticmethod
+    def _wait_before_retry(method: str, url: str, attempt: int, deadline: float, reason) -> bool:
+        """Sleeps a full-jitter backoff before the next attempt. Returns False when no attempt is left."""
+        if attempt >= HTTP_RETRY_MAX_ATTEMPTS:
+            return False
+        delay = random.uniform(0, min(HTTP_RETRY_MAX_DELAY, HTTP_RETRY_BASE_DELAY * 2**attempt))
+        if time.time() + delay > deadline:
+            return False
+        logging.warning(
+            f"{method.upper()} {url} failed ({reason}), retrying in {delay:.1f} seconds "
+            f"(attempt {attempt + 1}/{HTTP_RETRY_MAX_ATTEMPTS})."
+        )
+        time.sleep(delay)
+        return True
+
+    @staticmethod
+    def _is_token_expired(response: requests.models.Response) -> bool:
+        if response.status_code != 403:
+            return False
+        try:
+            return response.json().get("error", {}).get("code") == "TokenExpired"
+        except (ValueError, AttributeError):
+            return False
+
+    def refresh_dataset(self, group_url, dataset, enhanced: bool = False) -> requests.models.Response | bool:
+        """
+        Triggers a standard refresh, or an enhanced one when it may have to be cancelled. Enhanced refreshes
+        need a Premium, Premium Per User or Fabric capacity.
+        """
         refresh_url = f"https://api.powerbi.com/v1.0/myorg/{group_url}/datasets/{dataset}/refreshes"
         # https://learn.microsoft.com/en-us/rest/api/power-bi/datasets/refresh-dataset-in-group#limitations
         payload = {"notifyOption": "MailOnFailure"}
 
         try:
-            r = requests.post(refresh_url, headers=self.header, data=payload)
+            if enhanced:
+                r = self._send("post", refresh_url, headers=self.header, json=ENHANCED_REFRESH_PAYLOAD)
+            else:
+                r = self._send("post", refresh_url, headers=self.header, data=payload)
             if r.status_code == 202:
                 logging.info(f"Dataset {self._get_dataset_name(dataset)} refresh accepted by PowerBI API.")
                 return r
-            self._check_rate_limit(r)
             msg = json.loads(r.text)
             logging.error(
                 f"Failed to refresh dataset: error code: {msg['error']['code']} message: {msg['error']['message']}"
             )
             return False
 
-        except TooManyRequestsError:
+        except (TooManyRequestsError, PowerBIOutageError):
             raise
         except Exception as e:
             logging.error(f"Dataset refresh failed. Exception: {e}")
             return False
 
+    @staticmethod
+    def _get_refresh_id(response: requests.models.Response) -> str:
+        """
+        Returns the ID the refresh is listed under in the refresh history. An enhanced refresh returns it
+        at the end of its Location header, a standard refresh in the RequestId header.
+        """
+        location = response.headers.get("Location")
+        if location:
+            return location.rstrip("/").rsplit("/", 1)[-1]
+        return response.headers["RequestId"]
+
     def refresh_status(self, dataset_id, group_url):
         """
         Uses https://learn.microsoft.com/en-us/rest/api/power-bi/datasets/get-refresh-history
@@ -313,26 +1053,12 @@ class Component(ComponentBase):
         refresh_url = f"https://api.powerbi.com/v1.0/myorg/{group_url}/datasets/{dataset_id}/refreshes"
         return self._get_request(refresh_url)
 
-    @backoff.on_exception(backoff.expo, RequestException, max_tries=3)
-    @backoff.on_exception(
-        backoff.runtime,
-        TooManyRequestsError,
-        value=lambda exc: exc.retry_after if exc.retry_after is not None else RATE_LIMIT_DEFAULT_WAIT,
-        jitter=None,
-        max_tries=RATE_LIMIT_MAX_RETRIES,
-    )
     def _get_request(self, url):
-        response = requests.get(url=url, headers=self.header)
-
-        self._check_rate_limit(response)
+        response = self._send("get", url, headers=self.header)
 
         if response.status_code == 403:
             try:
-                error_message = response.json()
-                if error_message.get("error", {}).get("code") == "TokenExpired":
-                    access_token, _ = self.get_oauth_token()
-                    self.header = access_token
-                    response = requests.get(url=url, headers=self.header)
+                response.json()
             except ValueError:
                 raise UserException(
                     f"Request for url {url} failed with status code: {response.status_code}"
@@ -374,7 +1100,8 @@ class Component(ComponentBase):
 
         return NO_FAILURE_DETAIL
 
-    def process_status(self, request, request_list, success_list, running_list):
+    def process_status(self, request, request_list, success_list, running_list) -> str:
+        """Processes a polled refresh status and returns the resulting progress state of the dataset."""
         if request.status_code != 200:
             raise UserException(
                 f"Failed to refresh dataset {self._get_dataset_name(request_list[0])} "
@@ -382,52 +1109,207 @@ class Component(ComponentBase):
                 f"{request.text}"
             )
 
-        selected_status = [f["status"] for f in request.json()["value"] if request_list[1] in f["requestId"]]
+        selected = [f for f in request.json()["value"] if request_list[1] in f["requestId"]]
 
-        if not selected_status:
+        if not selected:
+            triggered_at = self.request_triggered_at.get(request_list[1], float("-inf"))
+            if time.time() - triggered_at < WAIT_BEFORE_STATUS_CHECK:
+                # the refresh history lists a just triggered refresh only after a while
+                running_list.append(request_list[0])
+                return "Running"
             logging.error(
                 f"Refresh request has been successful but the component cannot obtain refresh "
                 f"status for dataset refresh with id {request_list[1]}"
             )
             self.requestid_array.remove([request_list[0], request_list[1]])
-            return
+            return "Unavailable"
 
-        status = selected_status[0]
+        status = selected[0]["status"]
 
         if status == "Completed":
             success_list.append(request_list[0])
             self.requestid_array.remove([request_list[0], request_list[1]])
+            return "Refreshed"
         elif status == "Failed":
-            self.failed_list.append(request_list[0])
             self.requestid_array.remove([request_list[0], request_list[1]])
+            # the retry is decided by the polled refresh, not by the entry the error message quotes
+            polled_detail = selected[0].get("serviceExceptionJson") or NO_FAILURE_DETAIL
+            if self._schedule_retry(request_list[0], polled_detail):
+                return "Retrying"
+            failure_detail = self._get_failure_detail(request, request_list[1])
+            self.failed_list.append(request_list[0])
             if not self.alldatasets:
-                failure_detail = self._get_failure_detail(request, request_list[1])
                 failed_display = [self._get_dataset_name(d) for d in self.failed_list]
                 raise UserException(f"Dataset {failed_display} finished with error {failure_detail}")
+            return "Failed"
         elif status == "Disabled":
-            logging.info(f"Dataset {self._get_dataset_name(request_list[0])} is disabled")
             self.requestid_array.remove([request_list[0], request_list[1]])
+            return "Disabled"
         elif status == "Unknown":
             running_list.append(request_list[0])
+            return "Running"
         else:
             raise UserException(f"Unknown error in dataset {self._get_dataset_name(request_list[0])}")
 
     def check_status(self, group_url) -> None:
-        while self.requestid_array != [] and time.time() < self.timeout:
+        try:
+            self._poll_status(group_url)
+        except UserException as e:
+            if not self.cancel_on_failure or not self.requestid_array:
+                raise
+            self.cancel_running_refreshes(group_url)
+            raise UserException(f"{e}. {self._cancel_summary()}") from e
+
+        if self.requestid_array and self.cancel_on_failure:
+            timed_out = [self._get_dataset_name(d) for d, _ in self.requestid_array]
+            self.cancel_running_refreshes(group_url)
+            raise UserException(
+                f"Timeout reached while waiting for dataset refreshes {timed_out}. {self._cancel_summary()}"
+            )
+
+    def _poll_status(self, group_url) -> None:
+        progress = ProgressReporter(self._get_dataset_name)
+        while (self.requestid_array or self.retry_queue or self.dataflow_requests) and time.time() < self.timeout:
+            self._trigger_due_retries(group_url)
+            self._poll_dataflows(group_url)
             running_list = []
             success_list = []
-            for requestid in self.requestid_array:
+            # iterate over a copy, process_status removes finished requests from the array
+            for requestid in list(self.requestid_array):
                 try:
                     request = self.refresh_status(requestid[0], group_url)
                 except (RequestException, TooManyRequestsError) as e:
                     raise UserException(f"Refresh status check failed with exception: {e}")
 
-                self.process_status(request, requestid, success_list, running_list)
-                logging.info(f"Running: {[self._get_dataset_name(d) for d in running_list]}")
-                logging.info(f"Refreshed: {[self._get_dataset_name(d) for d in success_list]}")
-                logging.info(f"Failed to refresh: {[self._get_dataset_name(d) for d in self.failed_list]}")
-            if self.requestid_array:
+                progress.update(requestid[0], self.process_status(request, requestid, success_list, running_list))
+            if self.requestid_array or self.retry_queue or self.dataflow_requests:
+                progress.report()
                 time.sleep(self.interval)
+        progress.report(force=True)
+
+        # retries still waiting for their backoff when the timeout is reached end as failed
+        for dataset_id, _ in self.retry_queue:
+            self.failed_list.append(dataset_id)
+        self.retry_queue = []
+        self._fail_gated_datasets()
+
+    @staticmethod
+    def _is_retryable_failure(failure_detail: str) -> bool:
+        """
+        Classifies a refresh failure from its `serviceExceptionJson` detail. Only transient source, gateway
+        and capacity problems are retryable; credential, permission and model errors, as well as failures
+        without any detail, are not, since re-running them cannot succeed.
+        """
+        try:
+            detail = json.loads(failure_detail)
+        except (ValueError, TypeError):
+            detail = failure_detail
+        if isinstance(detail, dict):
+            error = detail.get("error") if isinstance(detail.get("error"), dict) else detail
+            detail = f"{error.get('errorCode', '')} {error.get('code', '')} {error.get('errorDescription', '')}"
+        if not isinstance(detail, str) or detail == NO_FAILURE_DETAIL:
+            return False
+
+        normalized = re.sub(r"[\s_.\-]", "", detail.lower())
+        if any(marker in normalized for marker in PERMANENT_FAILURE_MARKERS):
+            return False
+        return any(marker in normalized for marker in RETRYABLE_FAILURE_MARKERS)
+
+    def _schedule_retry(self, dataset_id: str, failure_detail: str) -> bool:
+        """Queues a re-trigger of a transiently failed refresh while its retry budget lasts."""
+        attempt = self.retry_counts.get(dataset_id, 0) + 1
+        if attempt > self.failed_refresh_retries or not self._is_retryable_failure(failure_detail):
+            return False
+
+        delay = min(RETRY_BASE_DELAY * 2 ** (attempt - 1), RETRY_MAX_DELAY)
+        if time.time() + delay >= self.timeout:
+            logging.warning(f"Dataset {self._get_dataset_name(dataset_id)} cannot be retried before the timeout.")
+            return False
+
+        self.retry_counts[dataset_id] = attempt
+        self.retry_queue.append((dataset_id, time.time() + delay))
+        logging.warning(
+            f"Dataset {self._get_dataset_name(dataset_id)} refresh failed with a transient error {failure_detail}. "
+            f"Retry {attempt}/{self.failed_refresh_retries} in {delay} seconds."
+        )
+        return True
+
+    def _trigger_due_retries(self, group_url) -> None:
+        now = time.time()
+        due = [item for item in self.retry_queue if item[1] <= now]
+        self.retry_queue = [item for item in self.retry_queue if item[1] > now]
+        for dataset_id, _ in due:
+            if not self._has_refresh_quota(group_url, dataset_id):
+                self.failed_list.append(dataset_id)
+                continue
+            logging.info(f"Re-triggering refresh of dataset {self._get_dataset_name(dataset_id)}")
+            response = self.refresh_dataset(group_url, dataset_id, enhanced=self.cancel_on_failure)
+            if response:
+                self._count_refresh(dataset_id)
+                request_id = self._get_refresh_id(response)
+                self.request_triggered_at[request_id] = time.time()
+                self.requestid_array.append([dataset_id, request_id])
+            else:
+                self.failed_list.append(dataset_id)
+
+    def cancel_refresh(self, group_url, dataset_id, request_id, deadline: float) -> bool:
+        """
+        Uses https://learn.microsoft.com/en-us/rest/api/power-bi/datasets/cancel-refresh-in-group
+        to cancel an enhanced refresh this job triggered, retrying until `deadline` at the latest. Never
+        raises, the outcome is only reported.
+        """
+        cancel_url = f"https://api.powerbi.com/v1.0/myorg/{group_url}/datasets/{dataset_id}/refreshes/{request_id}"
+        try:
+            response = self._send(
+                "delete", cancel_url, deadline=deadline, headers=self.header, timeout=CANCEL_REQUEST_TIMEOUT
+            )
+        except (RequestException, UserException) as e:
+            logging.warning(f"Failed to cancel refresh of dataset {self._get_dataset_name(dataset_id)}: {e}")
+            return False
+
+        if response.status_code != 200:
+            logging.warning(
+                f"Failed to cancel refresh of dataset {self._get_dataset_name(dataset_id)}. "
+                f"Status code: {response.status_code}, message: {response.text}"
+            )
+            return False
+
+        logging.info(f"Refresh of dataset {self._get_dataset_name(dataset_id)} cancelled.")
+        return True
+
+    def cancel_running_refreshes(self, group_url) -> None:
+        """
+        Cancels all refreshes triggered by this job that are still being polled, so a failed job stops
+        using capacity its retry will need. The requests are sent concurrently and every one of them, with
+        its retries, ends by the deadline of the round, CANCEL_TOTAL_TIMEOUT from now. Anything not
+        confirmed by then is reported as not cancelled.
+        """
+        pending = list(self.requestid_array)
+        if not pending:
+            return
+
+        logging.info(f"Cancelling {len(pending)} running dataset refreshes.")
+        deadline = time.time() + CANCEL_TOTAL_TIMEOUT
+        with ThreadPoolExecutor(max_workers=min(CANCEL_MAX_WORKERS, len(pending))) as executor:
+            futures = {
+                executor.submit(self.cancel_refresh, group_url, dataset_id, request_id, deadline): dataset_id
+                for dataset_id, request_id in pending
+            }
+
+        for future, dataset_id in futures.items():
+            if future.result():
+                self.cancelled_list.append(dataset_id)
+            else:
+                self.cancel_failed_list.append(dataset_id)
+        self.requestid_array = []
+
+    def _cancel_summary(self) -> str:
+        cancelled = [self._get_dataset_name(d) for d in self.cancelled_list]
+        cancel_failed = [self._get_dataset_name(d) for d in self.cancel_failed_list]
+        summary = f"Cancelled running refreshes: {cancelled}"
+        if cancel_failed:
+            summary += f", could not cancel: {cancel_failed}"
+        return summary
 
     def check_dataset_inputs(self) -> None:
         """
@@ -462,6 +1344,20 @@ class Component(ComponentBase):
 
         return workspaces
 
+    @sync_action("selectDataflow")
+    def get_dataflows(self):
+        if not self.workspace:
+            raise UserException("Dataflows can only be refreshed in a workspace. Please select the workspace first.")
+        self._client_init()
+        response = self._get_request(f"https://api.powerbi.com/v1.0/myorg/groups/{self.workspace}/dataflows")
+
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as e:
+            raise UserException(f"Error while fetching dataflows: {e}")
+
+        return [{"label": val["name"], "value": val["objectId"]} for val in response.json().get("value")]
+
     @sync_action("selectDataset")
     def get_datasets(self):
         self._client_init()
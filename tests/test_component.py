@@ -1,6 +1,8 @@
 import json
 import os
+import time
 import unittest
+from datetime import UTC, datetime, timedelta
 from unittest import mock
 from unittest.mock import MagicMock, patch
 
@@ -8,7 +10,16 @@ import requests
 from freezegun import freeze_time
 from keboola.component.exceptions import UserException
 
-from component import NO_FAILURE_DETAIL, RATE_LIMIT_DEFAULT_WAIT, Component, TooManyRequestsError
+from component import (
+    NO_FAILURE_DETAIL,
+    RATE_LIMIT_DEFAULT_WAIT,
+    WAIT_BEFORE_STATUS_CHECK,
+    CircuitBreaker,
+    Component,
+    PowerBIOutageError,
+    ProgressReporter,
+    TooManyRequestsError,
+)
 
 
 class TestComponent(unittest.TestCase):
@@ -94,6 +105,8 @@ class TestRefreshDataset429(unittest.TestCase):
         mock_post.side_effect = [response_429, response_202]
 
         comp = Component.__new__(Component)
+        comp.circuit_breakers = {}
+        comp.timeout = float("inf")
         comp._header = {"Authorization": "Bearer test", "Content-Type": "application/json"}
 
         result = comp.refresh_dataset("groups/workspace-id", "dataset-id")
@@ -113,6 +126,8 @@ class TestRefreshDataset429(unittest.TestCase):
         mock_post.return_value = response_400
 
         comp = Component.__new__(Component)
+        comp.circuit_breakers = {}
+        comp.timeout = float("inf")
         comp._header = {"Authorization": "Bearer test", "Content-Type": "application/json"}
 
         result = comp.refresh_dataset("groups/workspace-id", "dataset-id")
@@ -137,6 +152,8 @@ class TestGetRequest429(unittest.TestCase):
         mock_get.side_effect = [response_429, response_200]
 
         comp = Component.__new__(Component)
+        comp.circuit_breakers = {}
+        comp.timeout = float("inf")
         comp._header = {"Authorization": "Bearer test", "Content-Type": "application/json"}
 
         result = comp._get_request("https://api.powerbi.com/v1.0/myorg/test")
@@ -146,6 +163,160 @@ class TestGetRequest429(unittest.TestCase):
         mock_sleep.assert_called_once_with(23)
 
 
+class TestRetryPolicy(unittest.TestCase):
+    """Retries are decided centrally by outcome, not by blanket exception type."""
+
+    @staticmethod
+    def _component() -> Component:
+        comp = Component.__new__(Component)
+        comp.circuit_breakers = {}
+        comp._header = {"Authorization": "Bearer test", "Content-Type": "application/json"}
+        comp.dataset_names = {}
+        comp.timeout = float("inf")
+        return comp
+
+    @staticmethod
+    def _response(status_code, body=None) -> MagicMock:
+        response = MagicMock(status_code=status_code, headers={}, text=json.dumps(body or {}))
+        response.json.return_value = body or {}
+        return response
+
+    @patch("time.sleep")
+    @patch("component.requests.get")
+    def test_get_retries_server_errors_with_full_jitter(self, mock_get, mock_sleep):
+        mock_get.side_effect = [self._response(500), self._response(502), self._response(200)]
+
+        response = self._component()._get_request("https://api.powerbi.com/v1.0/myorg/groups")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_get.call_count, 3)
+        delays = [c.args[0] for c in mock_sleep.call_args_list]
+        self.assertTrue(0 <= delays[0] <= 2 and 0 <= delays[1] <= 4)
+
+    @patch("time.sleep")
+    @patch("component.requests.get")
+    def test_permanent_client_error_is_not_retried(self, mock_get, mock_sleep):
+        mock_get.return_value = self._response(404, {"error": {"code": "ItemNotFound"}})
+
+        response = self._component()._get_request("https://api.powerbi.com/v1.0/myorg/groups")
+
+        self.assertEqual(response.status_code, 404)
+        mock_get.assert_called_once()
+        mock_sleep.assert_not_called()
+
+    @patch("time.sleep")
+    @patch("component.requests.post")
+    def test_post_is_retried_only_when_not_accepted(self, mock_post, mock_sleep):
+        error = {"error": {"code": "InternalError", "message": "boom"}}
+        mock_post.side_effect = [self._response(503), self._response(500, error)]
+
+        result = self._component().refresh_dataset("groups/workspace-id", "dataset-id")
+
+        self.assertFalse(result)
+        self.assertEqual(mock_post.call_count, 2)
+
+    @patch("time.sleep")
+    @patch("component.requests.post")
+    def test_post_connection_reset_is_not_retried(self, mock_post, mock_sleep):
+        mock_post.side_effect = requests.exceptions.ConnectionError("connection reset")
+
+        self.assertFalse(self._component().refresh_dataset("groups/workspace-id", "dataset-id"))
+        mock_post.assert_called_once()
+
+    @patch("time.sleep")
+    @patch("component.requests.get")
+    def test_no_retry_beyond_the_job_timeout(self, mock_get, mock_sleep):
+        mock_get.side_effect = requests.exceptions.ConnectionError("connection reset")
+        comp = self._component()
+        comp.timeout = 0
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            comp._get_request("https://api.powerbi.com/v1.0/myorg/groups")
+        mock_get.assert_called_once()
+
+    @patch("component.requests.get")
+    def test_expired_token_is_renewed_once(self, mock_get):
+        expired = self._response(403, {"error": {"code": "TokenExpired"}})
+        mock_get.side_effect = [expired, self._response(200)]
+        comp = self._component()
+
+        def renew():
+            comp.header = "renewed-token"
+
+        comp._renew_access_token = MagicMock(side_effect=renew)
+
+        response = comp._get_request("https://api.powerbi.com/v1.0/myorg/groups")
+
+        self.assertEqual(response.status_code, 200)
+        comp._renew_access_token.assert_called_once()
+        self.assertEqual(mock_get.call_args.kwargs["headers"]["Authorization"], "Bearer renewed-token")
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """During an outage the job must fail quickly instead of every dataset exhausting its own retries."""
+
+    @staticmethod
+    def _component() -> Component:
+        comp = Component.__new__(Component)
+        comp.circuit_breakers = {}
+        comp.timeout = float("inf")
+        comp._header = {"Authorization": "Bearer test", "Content-Type": "application/json"}
+        comp.dataset_names = {}
+        return comp
+
+    @patch("time.sleep")
+    def test_opens_after_threshold_and_closes_on_successful_probe(self, mock_sleep):
+        breaker = CircuitBreaker("GET /datasets", threshold=2, cooldown=30)
+        breaker.before_request()
+        breaker.record_failure()
+        breaker.before_request()
+        breaker.record_failure()
+        self.assertIsNotNone(breaker.opened_at)
+
+        breaker.before_request()  # waits for the cooldown, then probes
+        mock_sleep.assert_called_once()
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            breaker.before_request()  # a concurrent caller is rejected while the probe runs
+        self.assertFalse(breaker.tripped)
+        breaker.record_success()
+
+        self.assertIsNone(breaker.opened_at)
+        self.assertEqual(breaker.failures, 0)
+        breaker.before_request()
+
+    @patch("time.sleep")
+    def test_failed_probe_trips_the_circuit(self, mock_sleep):
+        breaker = CircuitBreaker("GET /datasets", threshold=1, cooldown=0)
+        breaker.record_failure()
+        breaker.before_request()
+        with self.assertRaises(PowerBIOutageError):
+            breaker.record_failure()
+        with self.assertRaises(PowerBIOutageError):
+            breaker.before_request()
+
+    def test_endpoints_have_separate_circuits(self):
+        comp = self._component()
+        base = "https://api.powerbi.com/v1.0/myorg/groups/27582307-ab04-4269-a6e7-4d1c803ba6ba/datasets"
+        first = comp._circuit_breaker("get", f"{base}/3ad5e537-2352-43f2-a30e-14c6eb11712e/refreshes")
+        second = comp._circuit_breaker("get", f"{base}/11111111-2222-3333-4444-555555555555/refreshes")
+        self.assertIs(first, second)
+        self.assertIsNot(first, comp._circuit_breaker("post", f"{base}/3ad5e537-2352-43f2-a30e-14c6eb11712e/refreshes"))
+        self.assertEqual(first.endpoint, "GET https://api.powerbi.com/v1.0/myorg/groups/{id}/datasets/{id}/refreshes")
+
+    @patch("time.sleep")
+    @patch("component.requests.post")
+    def test_refresh_fails_job_on_outage(self, mock_post, mock_sleep):
+        mock_post.return_value = MagicMock(status_code=503, headers={}, text="Service Unavailable")
+        comp = self._component()
+
+        with self.assertRaises(PowerBIOutageError):
+            for i in range(10):
+                comp.refresh_dataset("groups/workspace-id", f"dataset-{i}")
+
+        # threshold failures plus a single half-open probe, nothing after the circuit tripped
+        self.assertEqual(mock_post.call_count, 6)
+
+
 class TestRequestNewTokenRetry(unittest.TestCase):
     """
     A transient connection reset on the OAuth token endpoint must be retried.
@@ -288,6 +459,8 @@ class TestProcessStatusFailedRaisesUserException(unittest.TestCase):
         comp.alldatasets = False
         comp.dataset_names = {}
         comp.requestid_array = [["dataset-id", "req-1"]]
+        comp.failed_refresh_retries = 0
+        comp.retry_counts = {}
         return comp
 
     def test_raises_user_exception_with_detail(self):
@@ -312,6 +485,614 @@ class TestProcessStatusFailedRaisesUserException(unittest.TestCase):
         self.assertIn("dataset-id", str(ctx.exception))
 
 
+class TestCancelRunningRefreshes(unittest.TestCase):
+    """A failed or timed out job must not leave its other refreshes running on the capacity."""
+
+    @staticmethod
+    def _component(cancel_on_failure=True) -> Component:
+        comp = Component.__new__(Component)
+        comp.circuit_breakers = {}
+        comp._header = {"Authorization": "Bearer test", "Content-Type": "application/json"}
+        comp.failed_list = []
+        comp.alldatasets = False
+        comp.dataset_names = {}
+        comp.requestid_array = [["dataset-failed", "req-1"], ["dataset-running", "req-2"]]
+        comp.cancel_on_failure = cancel_on_failure
+        comp.cancelled_list = []
+        comp.cancel_failed_list = []
+        comp.failed_refresh_retries = 0
+        comp.retry_counts = {}
+        comp.retry_queue = []
+        comp.request_triggered_at = {}
+        comp.dataflow_requests = []
+        comp.gated_datasets = {}
+        comp.interval = 0
+        comp.timeout = float("inf")
+        return comp
+
+    @staticmethod
+    def _history(request_id, status) -> MagicMock:
+        return _history_response([{"requestId": request_id, "status": status}])
+
+    @patch("component.requests.delete")
+    def test_fail_fast_cancels_remaining_refreshes(self, mock_delete):
+        mock_delete.return_value = MagicMock(status_code=200)
+        comp = self._component()
+        comp.refresh_status = MagicMock(side_effect=[self._history("req-1", "Failed")])
+
+        with self.assertRaises(UserException) as ctx:
+            comp.check_status("groups/workspace-id")
+
+        mock_delete.assert_called_once()
+        self.assertEqual(
+            mock_delete.call_args[0][0],
+            "https://api.powerbi.com/v1.0/myorg/groups/workspace-id/datasets/dataset-running/refreshes/req-2",
+        )
+        self.assertEqual(comp.cancelled_list, ["dataset-running"])
+        self.assertIn("Cancelled running refreshes: ['dataset-running']", str(ctx.exception))
+
+    @patch("component.requests.delete")
+    def test_fail_fast_without_option_does_not_cancel(self, mock_delete):
+        comp = self._component(cancel_on_failure=False)
+        comp.refresh_status = MagicMock(side_effect=[self._history("req-1", "Failed")])
+
+        with self.assertRaises(UserException):
+            comp.check_status("groups/workspace-id")
+
+        mock_delete.assert_not_called()
+
+    @patch("component.requests.delete")
+    def test_timeout_cancels_and_fails(self, mock_delete):
+        mock_delete.return_value = MagicMock(status_code=200)
+        comp = self._component()
+        comp.timeout = 0
+
+        with self.assertRaises(UserException) as ctx:
+            comp.check_status("groups/workspace-id")
+
+        self.assertEqual(mock_delete.call_count, 2)
+        self.assertIn("Timeout reached", str(ctx.exception))
+        self.assertCountEqual(comp.cancelled_list, ["dataset-failed", "dataset-running"])
+
+    @patch("component.requests.delete")
+    def test_timeout_without_option_keeps_previous_behaviour(self, mock_delete):
+        comp = self._component(cancel_on_failure=False)
+        comp.timeout = 0
+
+        comp.check_status("groups/workspace-id")
+
+        mock_delete.assert_not_called()
+
+    @patch("time.sleep")
+    @patch("component.requests.delete")
+    def test_failed_cancel_is_reported(self, mock_delete, mock_sleep):
+        def delete(url, **kwargs):
+            if "dataset-running" in url:
+                raise requests.exceptions.ConnectionError("connection reset")
+            return MagicMock(status_code=200)
+
+        mock_delete.side_effect = delete
+        comp = self._component()
+        comp.timeout = 0
+
+        with self.assertRaises(UserException) as ctx:
+            comp.check_status("groups/workspace-id")
+
+        self.assertEqual(comp.cancelled_list, ["dataset-failed"])
+        self.assertEqual(comp.cancel_failed_list, ["dataset-running"])
+        self.assertIn("could not cancel", str(ctx.exception))
+
+    @patch("component.requests.delete")
+    def test_cancel_requests_end_by_the_round_deadline(self, mock_delete):
+        mock_delete.return_value = MagicMock(status_code=200)
+        comp = self._component()
+        url = "https://api.powerbi.com/v1.0/myorg/groups/workspace-id/datasets/dataset-id/refreshes/req-1"
+
+        comp._send("delete", url, deadline=time.time() + 5, timeout=15)
+        self.assertLessEqual(mock_delete.call_args.kwargs["timeout"], 5)
+
+        with self.assertRaises(requests.exceptions.Timeout):
+            comp._send("delete", url, deadline=time.time() - 1, timeout=15)
+        mock_delete.assert_called_once()
+
+    @patch("time.sleep")
+    @patch("component.requests.delete")
+    def test_open_circuit_does_not_delay_the_cancel_round(self, mock_delete, mock_sleep):
+        comp = self._component()
+        url = "https://api.powerbi.com/v1.0/myorg/groups/workspace-id/datasets/dataset-id/refreshes/req-1"
+        comp._circuit_breaker("delete", url).opened_at = time.monotonic()
+
+        self.assertFalse(comp.cancel_refresh("groups/workspace-id", "dataset-id", "req-1", time.time() + 5))
+        mock_delete.assert_not_called()
+        mock_sleep.assert_not_called()
+
+    @patch("component.requests.post")
+    def test_cancellable_refresh_is_enhanced(self, mock_post):
+        mock_post.return_value = MagicMock(
+            status_code=202,
+            headers={
+                "Location": "https://api.powerbi.com/v1.0/myorg/groups/workspace-id/datasets/dataset-id/refreshes/ref-1",
+                "RequestId": "request-1",
+            },
+        )
+        comp = self._component()
+        comp.quota_ledger = None
+        comp.success_list = []
+        comp.requestid_array = []
+
+        comp._trigger_dataset("groups/workspace-id", "dataset-id")
+
+        self.assertEqual(mock_post.call_args.kwargs["json"], {"type": "Full"})
+        self.assertEqual(comp.requestid_array, [["dataset-id", "ref-1"]])
+
+
+class TestRetryTransientFailures(unittest.TestCase):
+    """Only datasets failing with a transient error are re-triggered, within their own retry budget."""
+
+    TIMEOUT_DETAIL = json.dumps({"errorCode": "DM_GWPipeline_Gateway_TimeoutError", "errorDescription": "Timeout"})
+    CREDENTIAL_DETAIL = json.dumps(
+        {"errorCode": "ModelRefreshFailed_CredentialsNotSpecified", "errorDescription": "Credentials are missing"}
+    )
+
+    @staticmethod
+    def _component(retries=2) -> Component:
+        comp = Component.__new__(Component)
+        comp.failed_list = []
+        comp.alldatasets = False
+        comp.dataset_names = {}
+        comp.requestid_array = [["dataset-id", "req-1"]]
+        comp.failed_refresh_retries = retries
+        comp.retry_counts = {}
+        comp.retry_queue = []
+        comp.request_triggered_at = {}
+        comp.quota_ledger = None
+        comp.cancel_on_failure = False
+        comp.dataflow_requests = []
+        comp.gated_datasets = {}
+        comp.interval = 0
+        comp.timeout = float("inf")
+        return comp
+
+    def _failed(self, request_id, detail) -> MagicMock:
+        return _history_response([{"requestId": request_id, "status": "Failed", "serviceExceptionJson": detail}])
+
+    def test_classification(self):
+        self.assertTrue(Component._is_retryable_failure(self.TIMEOUT_DETAIL))
+        self.assertTrue(Component._is_retryable_failure('{"error": {"code": "GatewayUnreachable"}}'))
+        self.assertTrue(Component._is_retryable_failure("Capacity is overloaded"))
+        self.assertFalse(Component._is_retryable_failure(self.CREDENTIAL_DETAIL))
+        self.assertFalse(Component._is_retryable_failure('{"errorCode": "Gateway_Credentials_Timeout"}'))
+        self.assertFalse(Component._is_retryable_failure(NO_FAILURE_DETAIL))
+
+    def test_transient_failure_is_queued_not_failed(self):
+        comp = self._component()
+        comp.process_status(self._failed("req-1", self.TIMEOUT_DETAIL), ["dataset-id", "req-1"], [], [])
+
+        self.assertEqual(comp.failed_list, [])
+        self.assertEqual(comp.retry_counts, {"dataset-id": 1})
+        self.assertEqual([d for d, _ in comp.retry_queue], ["dataset-id"])
+
+    def test_permanent_failure_is_not_retried(self):
+        comp = self._component()
+        with self.assertRaises(UserException):
+            comp.process_status(self._failed("req-1", self.CREDENTIAL_DETAIL), ["dataset-id", "req-1"], [], [])
+
+    def test_retry_is_decided_by_the_polled_refresh(self):
+        # the history lists the newest refresh first, entries[1] is the previous, transiently failed one
+        history = _history_response(
+            [
+                {"requestId": "req-2", "status": "Failed", "serviceExceptionJson": self.CREDENTIAL_DETAIL},
+                {"requestId": "req-1", "status": "Failed", "serviceExceptionJson": self.TIMEOUT_DETAIL},
+            ]
+        )
+        comp = self._component()
+        comp.requestid_array = [["dataset-id", "req-2"]]
+
+        with self.assertRaises(UserException):
+            comp.process_status(history, ["dataset-id", "req-2"], [], [])
+
+        self.assertEqual(comp.retry_queue, [])
+        self.assertEqual(comp.failed_list, ["dataset-id"])
+        self.assertEqual(comp.retry_queue, [])
+
+    @patch("component.RETRY_BASE_DELAY", 0)
+    @patch("time.sleep")
+    def test_only_failed_dataset_is_retriggered_until_budget_is_spent(self, mock_sleep):
+        comp = self._component(retries=1)
+        comp.alldatasets = True
+        comp.interval = 5
+        comp.refresh_status = MagicMock(
+            side_effect=[
+                self._failed("req-1", self.TIMEOUT_DETAIL),
+                self._failed("req-2", self.TIMEOUT_DETAIL),
+            ]
+        )
+        comp.refresh_dataset = MagicMock(return_value=MagicMock(headers={"RequestId": "req-2"}))
+
+        with freeze_time("2026-03-23 13:00:00") as frozen:
+            mock_sleep.side_effect = lambda seconds: frozen.tick(seconds)
+            comp.check_status("groups/workspace-id")
+
+        comp.refresh_dataset.assert_called_once_with("groups/workspace-id", "dataset-id", enhanced=False)
+        self.assertEqual(comp.failed_list, ["dataset-id"])
+
+    @patch("component.RETRY_BASE_DELAY", 0)
+    @patch("time.sleep")
+    def test_retriggered_refresh_missing_from_first_history_is_not_dropped(self, mock_sleep):
+        comp = self._component(retries=1)
+        comp.interval = 5
+        retriggered_at = []
+
+        def retrigger(*args, **kwargs):
+            retriggered_at.append(time.time())
+            return MagicMock(headers={"RequestId": "req-2"})
+
+        def history(*args):
+            if not retriggered_at:
+                return self._failed("req-1", self.TIMEOUT_DETAIL)
+            # the new refresh shows up in the history only a few seconds after it was triggered
+            if time.time() - retriggered_at[0] < WAIT_BEFORE_STATUS_CHECK:
+                return self._failed("req-1", self.TIMEOUT_DETAIL)
+            return _history_response([{"requestId": "req-2", "status": "Completed"}])
+
+        comp.refresh_dataset = MagicMock(side_effect=retrigger)
+        comp.refresh_status = MagicMock(side_effect=history)
+
+        with freeze_time("2026-03-23 13:00:00") as frozen, self.assertNoLogs(level="ERROR"):
+            mock_sleep.side_effect = lambda seconds: frozen.tick(seconds)
+            comp._poll_status("groups/workspace-id")
+
+        comp.refresh_dataset.assert_called_once()
+        self.assertEqual(comp.requestid_array, [])
+        self.assertEqual(comp.failed_list, [])
+
+    def test_pending_retry_fails_when_timeout_is_reached(self):
+        comp = self._component()
+        comp.requestid_array = []
+        comp.retry_queue = [("dataset-id", float("inf"))]
+        comp.timeout = 0
+
+        comp._poll_status("groups/workspace-id")
+
+        self.assertEqual(comp.failed_list, ["dataset-id"])
+
+
+class TestRefreshQuotaLedger(unittest.TestCase):
+    """Datasets over the daily quota are skipped without spending an API call."""
+
+    @staticmethod
+    def _component(state=None, limit=2) -> Component:
+        comp = Component.__new__(Component)
+        comp.daily_refresh_limit = limit
+        comp.service_principal = False
+        comp.dataset_names = {}
+        comp.quota_ledger = None
+        comp.get_state_file = MagicMock(return_value=state or {})
+        return comp
+
+    @freeze_time("2026-03-23 13:00:00")
+    def test_ledger_from_previous_day_is_reset(self):
+        comp = self._component({"refresh_quota": {"date": "2026-03-22", "counts": {"dataset-id": 8}}})
+        comp._load_quota_ledger()
+        self.assertEqual(comp.quota_ledger, {"date": "2026-03-23", "counts": {}})
+
+    def test_disabled_limit_keeps_no_ledger(self):
+        comp = self._component({"refresh_quota": {"date": "2026-03-23", "counts": {}}}, limit=0)
+        comp._load_quota_ledger()
+        self.assertIsNone(comp.quota_ledger)
+        self.assertTrue(comp._has_refresh_quota("groups/workspace-id", "dataset-id"))
+
+    @freeze_time("2026-03-23 13:00:00")
+    def test_missing_count_is_seeded_from_refresh_history(self):
+        comp = self._component()
+        comp._load_quota_ledger()
+        comp.refresh_status = MagicMock(
+            return_value=_history_response(
+                [
+                    {"requestId": "req-2", "refreshType": "ViaApi", "startTime": "2026-03-23T10:00:00Z"},
+                    {"requestId": "req-1", "refreshType": "Scheduled", "startTime": "2026-03-23T08:00:00Z"},
+                    {"requestId": "req-0", "refreshType": "ViaApi", "startTime": "2026-03-22T23:00:00Z"},
+                ]
+            )
+        )
+
+        self.assertTrue(comp._has_refresh_quota("groups/workspace-id", "dataset-id"))
+        self.assertEqual(comp.quota_ledger["counts"], {"dataset-id": 1})
+
+        comp._count_refresh("dataset-id")
+        self.assertFalse(comp._has_refresh_quota("groups/workspace-id", "dataset-id"))
+        comp.refresh_status.assert_called_once()
+
+    @freeze_time("2026-03-23 13:00:00")
+    @patch("component.requests.post")
+    def test_run_skips_dataset_over_quota_without_posting(self, mock_post):
+        comp = self._component({"refresh_quota": {"date": "2026-03-23", "counts": {"dataset-id": 2}}})
+        comp._init_run_parameters = MagicMock()
+        comp._client_init = MagicMock()
+        comp._load_dataset_names = MagicMock()
+        comp.dataset_refreshable = None
+        comp._write_state = MagicMock()
+        comp.dataset_array = [{"dataset_input": "dataset-id"}]
+        comp.load_datasets = MagicMock()
+        comp.workspace = "workspace-id"
+        comp.wait = False
+        comp.success_list = []
+        comp.failed_list = []
+        comp.skipped_list = []
+        comp.requestid_array = []
+        comp.retry_counts = {}
+        comp.dataflow_ids = []
+        comp.dataflow_requests = []
+        comp.gated_datasets = {}
+        comp.failed_dataflows = []
+
+        comp.run()
+
+        mock_post.assert_not_called()
+        self.assertEqual(comp.skipped_list, ["dataset-id"])
+        comp._write_state.assert_called_once()
+
+    def test_sync_action_state_write_keeps_ledger(self):
+        ledger = {"date": "2026-03-23", "counts": {"dataset-id": 2}}
+        comp = self._component({"refresh_quota": ledger, "#refresh_token": "old-token", "auth_id": "cred-id"})
+        comp.authorization = {"oauth_api": {"credentials": {"id": "cred-id"}}}
+        comp.refresh_token = "rotated-token"
+        comp.write_state_file = MagicMock()
+
+        comp._write_state()
+
+        comp.write_state_file.assert_called_once_with(
+            {"refresh_quota": ledger, "#refresh_token": "rotated-token", "auth_id": "cred-id"}
+        )
+
+
+class TestProgressReporter(unittest.TestCase):
+    """Log volume must follow state transitions, not datasets times poll cycles."""
+
+    def test_logs_dataset_only_on_transition(self):
+        reporter = ProgressReporter(lambda d: d)
+        with self.assertLogs(level="INFO") as logs:
+            reporter.update("dataset-a", "Running")
+            reporter.update("dataset-a", "Running")
+            reporter.update("dataset-a", "Refreshed")
+        self.assertEqual(
+            logs.output, ["INFO:root:Dataset dataset-a: Running", "INFO:root:Dataset dataset-a: Running -> Refreshed"]
+        )
+
+    @patch("component.time.monotonic")
+    def test_summary_is_throttled_without_changes(self, mock_monotonic):
+        mock_monotonic.side_effect = [0, 10, 70]
+        reporter = ProgressReporter(lambda d: d, min_interval=60)
+        with self.assertLogs(level="INFO"):
+            reporter.update("dataset-a", "Running")
+            reporter.update("dataset-b", "Running")
+        with self.assertLogs(level="INFO") as logs:
+            reporter.report()  # changed since last summary
+            reporter.report()  # no change, within the interval
+            reporter.report()  # no change, interval elapsed
+        self.assertEqual(logs.output, ["INFO:root:Refresh progress (2 datasets) - Running: 2"] * 2)
+
+    def test_forced_summary_counts_states(self):
+        reporter = ProgressReporter(lambda d: d)
+        with self.assertLogs(level="INFO") as logs:
+            reporter.update("dataset-a", "Refreshed")
+            reporter.update("dataset-b", "Failed")
+            reporter.update("dataset-c", "Refreshed")
+            reporter.report(force=True)
+        self.assertEqual(logs.output[-1], "INFO:root:Refresh progress (3 datasets) - Failed: 1, Refreshed: 2")
+
+
+class TestValidateDatasets(unittest.TestCase):
+    """Configured dataset IDs are validated at once, before any refresh is triggered."""
+
+    @staticmethod
+    def _component(skip=False) -> Component:
+        comp = Component.__new__(Component)
+        comp.skip_invalid_datasets = skip
+        comp.dataset_names = {}
+        comp.dataset_refreshable = None
+        comp.dataset_array = [{"dataset_input": d} for d in ("dataset-ok", "dataset-push", "dataset-unknown")]
+        comp._get_request = MagicMock(
+            return_value=MagicMock(
+                status_code=200,
+                json=lambda: {
+                    "value": [
+                        {"id": "dataset-ok", "name": "Sales", "isRefreshable": True},
+                        {"id": "dataset-push", "name": "Push", "isRefreshable": False},
+                    ]
+                },
+            )
+        )
+        comp._load_dataset_names("groups/workspace-id")
+        return comp
+
+    def test_fails_fast_on_missing_and_not_refreshable(self):
+        comp = self._component()
+        with self.assertRaises(UserException) as ctx:
+            comp.validate_datasets()
+        self.assertIn("not found or not accessible in the workspace: ['dataset-unknown']", str(ctx.exception))
+        self.assertIn("not refreshable: [\"'Push' (dataset-push)\"]", str(ctx.exception))
+
+    def test_skips_invalid_datasets(self):
+        comp = self._component(skip=True)
+        comp.validate_datasets()
+        self.assertEqual(comp.dataset_array, [{"dataset_input": "dataset-ok"}])
+
+    def test_fails_when_nothing_valid_is_left(self):
+        comp = self._component(skip=True)
+        comp.dataset_array = [{"dataset_input": "dataset-unknown"}]
+        with self.assertRaises(UserException) as ctx:
+            comp.validate_datasets()
+        self.assertIn("No valid dataset left", str(ctx.exception))
+
+    def test_ids_are_compared_case_insensitively(self):
+        comp = self._component()
+        comp.dataset_array = [{"dataset_input": " DATASET-OK "}]
+        comp.validate_datasets()
+        self.assertEqual(comp.dataset_array, [{"dataset_input": " DATASET-OK "}])
+
+    def test_skipped_when_dataset_list_is_unavailable(self):
+        comp = self._component()
+        comp.dataset_refreshable = None
+        comp.validate_datasets()
+        self.assertEqual(len(comp.dataset_array), 3)
+
+
+class TestDataflowPipeline(unittest.TestCase):
+    """Each dataset starts as soon as its own upstream dataflows are refreshed, not when all of them are."""
+
+    TRIGGERED_AT = datetime(2026, 3, 23, 13, 0, tzinfo=UTC)
+
+    @staticmethod
+    def _component() -> Component:
+        comp = Component.__new__(Component)
+        comp._header = {"Authorization": "Bearer test", "Content-Type": "application/json"}
+        comp.dataset_names = {}
+        comp.dataflow_names = {}
+        comp.dataflow_ids = ["flow-a", "flow-b"]
+        comp.dataflow_requests = []
+        comp.gated_datasets = {}
+        comp.failed_dataflows = []
+        comp.failed_list = []
+        comp.success_list = []
+        comp.skipped_list = []
+        comp.requestid_array = []
+        comp.request_triggered_at = {}
+        comp.retry_queue = []
+        comp.quota_ledger = None
+        comp.cancel_on_failure = False
+        comp.alldatasets = True
+        comp.interval = 5
+        comp.timeout = float("inf")
+        comp.dataset_array = [{"dataset_input": d} for d in ("dataset-a", "dataset-ab", "dataset-free")]
+        comp._load_dataflow_names = MagicMock()
+        comp._load_dataflow_dependencies = MagicMock(
+            return_value={"dataset-a": {"flow-a"}, "dataset-ab": {"flow-a", "flow-b"}, "dataset-free": {"other"}}
+        )
+        comp.refresh_dataflow = MagicMock(return_value=True)
+        comp.refresh_dataset = MagicMock(
+            side_effect=lambda group_url, dataset, enhanced: MagicMock(headers={"RequestId": f"req-{dataset}"})
+        )
+        return comp
+
+    def _transactions(self, status, minutes_after=1, ended_after=None) -> MagicMock:
+        def api_time(offset: timedelta) -> str:
+            return (self.TRIGGERED_AT + offset).isoformat().replace("+00:00", "Z")
+
+        transaction = {"id": "tx-1", "startTime": api_time(timedelta(minutes=minutes_after)), "status": status}
+        if ended_after is not None:
+            transaction["endTime"] = api_time(ended_after)
+        return _history_response([transaction])
+
+    def test_datasets_are_held_by_their_own_upstream_dataflows(self):
+        comp = self._component()
+        comp.start_dataflows("groups/workspace-id")
+
+        self.assertEqual(comp.gated_datasets, {"dataset-a": {"flow-a"}, "dataset-ab": {"flow-a", "flow-b"}})
+        self.assertEqual([d for d, _ in comp.dataflow_requests], ["flow-a", "flow-b"])
+
+    @freeze_time("2026-03-23 13:00:00")
+    def test_dataset_starts_when_its_dataflows_finish(self):
+        comp = self._component()
+        comp.start_dataflows("groups/workspace-id")
+        comp.dataflow_status = MagicMock(
+            side_effect=lambda dataflow_id, group_url: self._transactions(
+                "Success" if dataflow_id == "flow-a" else "InProgress"
+            )
+        )
+
+        comp._poll_dataflows("groups/workspace-id")
+
+        comp.refresh_dataset.assert_called_once_with("groups/workspace-id", "dataset-a", enhanced=False)
+        self.assertEqual(comp.gated_datasets, {"dataset-ab": {"flow-b"}})
+        self.assertEqual([d for d, _ in comp.dataflow_requests], ["flow-b"])
+
+    @freeze_time("2026-03-23 13:00:00")
+    def test_failed_dataflow_fails_its_dependent_datasets(self):
+        comp = self._component()
+        comp.start_dataflows("groups/workspace-id")
+        comp.dataflow_status = MagicMock(
+            side_effect=lambda dataflow_id, group_url: self._transactions(
+                "Failed" if dataflow_id == "flow-b" else "InProgress"
+            )
+        )
+
+        comp._poll_dataflows("groups/workspace-id")
+
+        self.assertEqual(comp.failed_dataflows, ["flow-b"])
+        self.assertEqual(comp.failed_list, ["dataset-ab"])
+        comp.refresh_dataset.assert_not_called()
+
+    @patch("time.sleep")
+    def test_released_dataset_missing_from_first_history_is_not_dropped(self, mock_sleep):
+        comp = self._component()
+        comp.dataflow_ids = ["flow-a"]
+        comp.dataset_array = [{"dataset_input": "dataset-a"}]
+        comp.dataflow_status = MagicMock(return_value=self._transactions("Success"))
+        released_at = []
+
+        def release(group_url, dataset, enhanced):
+            released_at.append(time.time())
+            return MagicMock(headers={"RequestId": "req-dataset-a"})
+
+        def history(*args):
+            # the released refresh shows up in the history only a few seconds after it was triggered
+            if time.time() - released_at[0] < WAIT_BEFORE_STATUS_CHECK:
+                return _history_response([])
+            return _history_response([{"requestId": "req-dataset-a", "status": "Completed"}])
+
+        comp.refresh_dataset = MagicMock(side_effect=release)
+        comp.refresh_status = MagicMock(side_effect=history)
+
+        with freeze_time("2026-03-23 13:00:00") as frozen, self.assertNoLogs(level="ERROR"):
+            mock_sleep.side_effect = lambda seconds: frozen.tick(seconds)
+            comp.start_dataflows("groups/workspace-id")
+            comp._poll_status("groups/workspace-id")
+
+        comp.refresh_dataset.assert_called_once()
+        self.assertEqual(comp.requestid_array, [])
+        self.assertEqual(comp.failed_list, [])
+
+    def test_dependencies_match_ids_in_any_case(self):
+        comp = self._component()
+        comp.dataflow_ids = ["FLOW-A"]
+        comp.dataset_array = [{"dataset_input": "Dataset-A"}]
+        comp._get_request = MagicMock(
+            return_value=_history_response([{"datasetObjectId": "dataset-a", "dataflowObjectId": "Flow-A"}])
+        )
+        del comp._load_dataflow_dependencies  # read the links through the real method
+
+        comp.start_dataflows("groups/workspace-id")
+
+        self.assertEqual(comp.gated_datasets, {"Dataset-A": {"FLOW-A"}})
+
+    def test_unknown_dependencies_hold_datasets_for_all_dataflows(self):
+        comp = self._component()
+        comp._load_dataflow_dependencies.return_value = None
+        comp.start_dataflows("groups/workspace-id")
+        self.assertEqual(set(comp.gated_datasets), {"dataset-a", "dataset-ab", "dataset-free"})
+
+    def test_older_transaction_is_not_taken_for_this_trigger(self):
+        comp = self._component()
+        state = comp.process_dataflow_status(self._transactions("Success", -30), "flow-a", self.TRIGGERED_AT)
+        self.assertEqual(state, "Running")
+
+    def test_transaction_started_shortly_before_the_trigger_is_not_taken(self):
+        comp = self._component()
+        response = self._transactions("Success", -0.5)
+        self.assertEqual(comp.process_dataflow_status(response, "flow-a", self.TRIGGERED_AT), "Running")
+
+    def test_transaction_within_clock_skew_is_taken(self):
+        comp = self._component()
+        response = self._transactions("Success", -2 / 60, ended_after=timedelta(minutes=5))
+        self.assertEqual(comp.process_dataflow_status(response, "flow-a", self.TRIGGERED_AT), "Refreshed")
+
+    def test_transaction_that_ended_before_the_trigger_is_not_taken(self):
+        comp = self._component()
+        response = self._transactions("Failed", -2 / 60, ended_after=timedelta(seconds=-1))
+        self.assertEqual(comp.process_dataflow_status(response, "flow-a", self.TRIGGERED_AT), "Running")
+
+
 class TestTokenAuthority(unittest.TestCase):
     """The token authority must be configurable to support B2B guest accounts."""
 
@@ -351,6 +1132,156 @@ class TestTokenAuthority(unittest.TestCase):
         self.assertIn("upstream exploded", str(ctx.exception))
 
 
+class TestServicePrincipalToken(unittest.TestCase):
+    """Client credentials tokens are reused until expiry and only a newly issued token is written to the state."""
+
+    SP_ID = "tenant-guid/app-id"
+    NOW = 1774270800  # 2026-03-23 13:00:00 UTC
+
+    @staticmethod
+    def _component(state=None) -> Component:
+        comp = Component.__new__(Component)
+        comp.tenant_id = "tenant-guid"
+        comp.service_principal = True
+        comp.sp_token_state = {}
+        comp.quota_ledger = None
+        comp.get_state_file = MagicMock(return_value=state or {})
+        comp.write_state_file = MagicMock()
+        return comp
+
+    def setUp(self):
+        configuration = patch.object(
+            Component,
+            "configuration",
+            new_callable=mock.PropertyMock,
+            return_value=MagicMock(parameters={"client_id": "app-id", "#client_secret": "secret"}),
+        )
+        configuration.start()
+        self.addCleanup(configuration.stop)
+
+    @freeze_time("2026-03-23 13:00:00")
+    def test_reuses_cached_token_without_writing_state(self):
+        comp = self._component(
+            {
+                "service_principal_id": self.SP_ID,
+                "#service_principal_token": "cached-token",
+                "service_principal_token_expires_on": self.NOW + 3600,
+            }
+        )
+        with patch("component.requests.post") as mock_post:
+            comp._client_init()
+
+        mock_post.assert_not_called()
+        comp.write_state_file.assert_not_called()
+        self.assertEqual(comp.header["Authorization"], "Bearer cached-token")
+
+    @freeze_time("2026-03-23 13:00:00")
+    def test_requests_new_token_when_cached_one_expires_soon(self):
+        comp = self._component(
+            {
+                "service_principal_id": self.SP_ID,
+                "#service_principal_token": "cached-token",
+                "service_principal_token_expires_on": self.NOW + 60,
+            }
+        )
+        response = MagicMock(status_code=200)
+        response.json.return_value = {"access_token": "new-token", "expires_on": "1774278000"}
+        with patch("component.requests.post", return_value=response) as mock_post:
+            comp._client_init()
+
+        payload = mock_post.call_args[1]["data"]
+        self.assertEqual(payload["grant_type"], "client_credentials")
+        self.assertNotIn("refresh_token", payload)
+        self.assertEqual(mock_post.call_args[0][0], "https://login.microsoftonline.com/tenant-guid/oauth2/token")
+        comp.write_state_file.assert_called_once_with(
+            {
+                "service_principal_id": self.SP_ID,
+                "#service_principal_token": "new-token",
+                "service_principal_token_expires_on": 1774278000.0,
+            }
+        )
+        self.assertEqual(comp.header["Authorization"], "Bearer new-token")
+
+    def test_token_of_another_application_is_not_reused(self):
+        comp = self._component(
+            {
+                "service_principal_id": "tenant-guid/other-app",
+                "#service_principal_token": "cached-token",
+                "service_principal_token_expires_on": 9999999999,
+            }
+        )
+        response = MagicMock(status_code=200)
+        response.json.return_value = {"access_token": "new-token", "expires_in": "3599"}
+        with patch("component.requests.post", return_value=response):
+            self.assertEqual(comp.get_service_principal_token(), "new-token")
+
+    def test_requires_tenant_id(self):
+        comp = self._component()
+        comp.tenant_id = "common"
+        with self.assertRaises(UserException) as ctx:
+            comp.get_service_principal_token()
+        self.assertIn("Tenant ID", str(ctx.exception))
+
+
+class TestLeanClientInit(unittest.TestCase):
+    """Sync actions must not write the state when the OAuth exchange returned the stored refresh token."""
+
+    AUTHORIZATION = {
+        "oauth_api": {
+            "credentials": {
+                "id": "cred-id",
+                "appKey": "client-id",
+                "#appSecret": "client-secret",
+                "#data": json.dumps({"refresh_token": "authorized-token"}),
+            }
+        }
+    }
+
+    def setUp(self):
+        configuration = patch.object(
+            Component,
+            "configuration",
+            new_callable=mock.PropertyMock,
+            return_value=MagicMock(config_data={"authorization": self.AUTHORIZATION}),
+        )
+        configuration.start()
+        self.addCleanup(configuration.stop)
+
+    @staticmethod
+    def _component(refresh_token) -> Component:
+        comp = Component.__new__(Component)
+        comp.tenant_id = "common"
+        comp.service_principal = False
+        comp.quota_ledger = None
+        comp.workspace = ""
+        comp.get_state_file = MagicMock(return_value={"#refresh_token": "stored-token", "auth_id": "cred-id"})
+        comp.write_state_file = MagicMock()
+        comp._request_new_token = MagicMock(
+            return_value={"access_token": "access-token", "refresh_token": refresh_token}
+        )
+        return comp
+
+    def test_unchanged_token_is_not_written(self):
+        comp = self._component("stored-token")
+        comp._client_init()
+        comp.write_state_file.assert_not_called()
+        comp.get_state_file.assert_called_once()
+        self.assertEqual(comp.header["Authorization"], "Bearer access-token")
+
+    def test_rotated_token_is_written(self):
+        comp = self._component("rotated-token")
+        comp._client_init()
+        comp.write_state_file.assert_called_once_with({"#refresh_token": "rotated-token", "auth_id": "cred-id"})
+
+    def test_sync_action_ignores_run_parameters(self):
+        """A malformed run-only parameter must not break the workspace and dataset pickers."""
+        comp = self._component("stored-token")
+        comp._get_request = MagicMock(return_value=MagicMock(json=lambda: {"value": []}))
+        with patch.object(Component, "_init_run_parameters") as init_run_parameters:
+            self.assertEqual(comp.get_workspaces(), [{"label": "Default Workspace", "value": ""}])
+        init_run_parameters.assert_not_called()
+
+
 class TestResolveTenantId(unittest.TestCase):
     """Blank keeps the historical `common` authority; malformed input fails cleanly, not with a traceback."""
 